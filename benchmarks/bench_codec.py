@@ -0,0 +1,57 @@
+"""
+Benchmark: wire codec throughput
+
+Measures encode and decode throughput of every available codec on large
+synthetic sheet, lead and document payloads.
+
+Run with: python benchmarks/bench_codec.py
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from codec import available_codecs, get_codec
+from benchmarks.synthetic import make_document, make_leads, make_sheet
+
+
+def best_of(func, repeat: int = 3) -> float:
+    """Return the fastest of `repeat` runs, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    payloads = [
+        ('sheet 100k rows', make_sheet()),
+        ('leads 100k records', make_leads()),
+        ('document 4M chars', make_document()),
+    ]
+    # Reference size for throughput: the compact stdlib JSON encoding
+    reference = get_codec('json')
+
+    print("Codec throughput (MB/s of JSON-equivalent payload, best of 3)")
+    print("=" * 70)
+    print(f"{'payload':<20} {'codec':<14} {'size MB':>8} {'encode':>10} {'decode':>10}")
+
+    for label, payload in payloads:
+        megabytes = len(reference.encode(payload)) / 1e6
+        for name in available_codecs():
+            codec = get_codec(name)
+            data = codec.encode(payload)
+            assert codec.decode(data) == payload
+            encode = best_of(lambda: codec.encode(payload))
+            decode = best_of(lambda: codec.decode(data))
+            print(f"{label:<20} {name:<14} {len(data) / 1e6:>8.2f} "
+                  f"{megabytes / encode:>10.1f} {megabytes / decode:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: payload compression
+
+Reports the latency/CPU trade-off of compressing tool payloads of various
+sizes: compression ratio, compress and streamed-decompress time, and the
+end-to-end time on a link of the given bandwidth compared with sending the
+payload raw.
+
+Run with: python benchmarks/bench_compression.py [link Mbit/s, default 100]
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from codec import available_codecs, get_codec
+from compression import COMPRESSIONS, Zlib, iter_frame, encode_frame
+from benchmarks.synthetic import make_document, make_sheet
+
+
+def best_of(func, repeat: int = 3) -> float:
+    """Return the fastest of `repeat` runs, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def drain(frame, compression):
+    for _ in iter_frame(frame, compression):
+        pass
+
+
+def main():
+    mbps = float(sys.argv[1]) if len(sys.argv) > 1 else 100.0
+    bytes_per_second = mbps * 1e6 / 8
+    codec = get_codec(available_codecs()[0])
+
+    sheet = make_sheet(100_000)['rows']
+    payloads = [
+        ('sheet 10 rows', {'rows': sheet[:10]}),
+        ('sheet 100 rows', {'rows': sheet[:100]}),
+        ('sheet 1k rows', {'rows': sheet[:1_000]}),
+        ('sheet 10k rows', {'rows': sheet[:10_000]}),
+        ('sheet 100k rows', {'rows': sheet}),
+        ('document 4M chars', make_document()),
+    ]
+
+    algorithms = [Zlib(1), Zlib(6)]
+    if 'zstd' in COMPRESSIONS:
+        from compression import Zstd
+        algorithms += [Zstd(1), Zstd(3)]
+
+    print(f"Compression trade-off ({codec.name} payloads, {mbps:g} Mbit/s link, best of 3)")
+    print("=" * 86)
+    print(f"{'payload':<18} {'algorithm':<10} {'KB':>9} {'ratio':>6} "
+          f"{'comp ms':>8} {'decomp ms':>9} {'total ms':>9} {'raw ms':>8}")
+
+    for label, payload in payloads:
+        data = codec.encode(payload)
+        raw_ms = len(data) / bytes_per_second * 1000
+        for algorithm in algorithms:
+            frame = encode_frame(data, algorithm, threshold=0)
+            compress = best_of(lambda: encode_frame(data, algorithm, threshold=0))
+            decompress = best_of(lambda: drain(frame, algorithm))
+            wire_ms = len(frame) / bytes_per_second * 1000
+            total_ms = (compress + decompress) * 1000 + wire_ms
+            name = f"{algorithm.name}-{algorithm.level}"
+            print(f"{label:<18} {name:<10} {len(data) / 1024:>9.1f} "
+                  f"{len(data) / len(frame):>6.2f} {compress * 1000:>8.2f} "
+                  f"{decompress * 1000:>9.2f} {total_ms:>9.2f} {raw_ms:>8.2f}")
+
+    print()
+    print("Compression pays off once 'total ms' drops below 'raw ms';")
+    print("set client.COMPRESSION_THRESHOLD near the smallest such payload size.")
+
+
+if __name__ == '__main__':
+    main()
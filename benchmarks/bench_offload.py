@@ -0,0 +1,102 @@
+"""
+Benchmark: offloading work from the event loop
+
+Runs CPU-bound and blocking work inline on the event loop and through
+offload.py while a probe task measures event-loop lag: how late a 1 ms
+sleep wakes up. Lag is how long every in-flight tool call is held up.
+
+Run with: python benchmarks/bench_offload.py
+"""
+
+import sys
+import os
+import asyncio
+import csv
+import re
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import offload
+from benchmarks.synthetic import make_document, make_sheet
+
+ACTION_ITEM = re.compile(r'\b(?:budget|roadmap)\b[^\n]*\bpriority\b')
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def scan(text):
+    return len(ACTION_ITEM.findall(text))
+
+
+def large_pending(columns):
+    amounts = columns['Amount']
+    return [i for i, status in enumerate(columns['Status'])
+            if status == 'pending' and amounts[i] > 500]
+
+
+async def measure(work):
+    """Run work() while probing loop lag; return (seconds, max lag ms, mean lag ms)."""
+    lags = []
+    done = False
+
+    async def probe():
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(max(0.0, time.perf_counter() - start - 0.001))
+
+    prober = asyncio.ensure_future(probe())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    done = True
+    await prober
+    return elapsed, max(lags) * 1000, sum(lags) / len(lags) * 1000
+
+
+async def main():
+    rows = make_sheet(500_000)['rows']
+    text = make_document(20_000_000)['content']
+    path = os.path.join(tempfile.mkdtemp(), 'orders.csv')
+
+    # Start the pools so their start-up is not measured
+    await offload.to_thread(len, rows)
+    await offload.to_process(len, text[:10])
+
+    async def filter_inline():
+        columns = {'Status': [r['Status'] for r in rows], 'Amount': [r['Amount'] for r in rows]}
+        return [rows[i] for i in large_pending(columns)]
+
+    cases = [
+        ('write 500k-row CSV', lambda: _sync(write_csv, path, rows),
+         lambda: offload.offload(write_csv, path, rows, size=len(rows), kind='io')),
+        ('filter 500k rows', filter_inline,
+         lambda: offload.select_rows(rows, large_pending, ['Status', 'Amount'])),
+        ('regex scan 20 MB transcript', lambda: _sync(scan, text),
+         lambda: offload.offload(scan, text, kind='cpu')),
+    ]
+
+    print(f"{'work':<30} {'mode':<9} {'time ms':>9} {'max lag ms':>11} {'mean lag ms':>12}")
+    for name, inline, offloaded in cases:
+        for mode, work in (('inline', inline), ('offload', offloaded)):
+            elapsed, max_lag, mean_lag = await measure(work)
+            print(f"{name:<30} {mode:<9} {elapsed * 1000:>9.1f} {max_lag:>11.1f} {mean_lag:>12.2f}")
+
+    offload.shutdown()
+
+
+async def _sync(func, *args):
+    return func(*args)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""
+Benchmark: local workspace queries
+
+Compares answering repeated filters and aggregates over a large sheet by
+re-fetching it and scanning in Python, by scanning an in-memory copy, and
+by querying the SQLite workspace. Re-fetching is measured as decoding the
+sheet payload with the negotiated codec; network latency comes on top.
+
+Run with: python benchmarks/bench_workspace_query.py
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from codec import available_codecs, get_codec
+from workspace_query import Workspace
+from benchmarks.synthetic import CUSTOMERS, make_sheet
+
+
+def timed(func, repeat: int = 20) -> float:
+    """Return the mean time of `repeat` runs, in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    rows = make_sheet(100_000)['rows']
+    ws = Workspace(':memory:')
+
+    start = time.perf_counter()
+    ws.ingest('orders', rows)
+    ws.create_index('orders', 'Status', 'Customer')
+    ws.create_index('orders', 'Status', 'Amount')
+    ws.create_index('orders', 'Amount')
+    ingest_ms = (time.perf_counter() - start) * 1000
+
+    codec = get_codec(available_codecs()[0])
+    payload = codec.encode({'rows': rows})
+    fetch_ms = timed(lambda: codec.decode(payload), repeat=5)
+
+    customer = CUSTOMERS[1]
+    cases = [
+        (
+            'filter Status + Customer',
+            lambda: [r for r in rows if r['Status'] == 'pending' and r['Customer'] == customer],
+            lambda: ws.select('orders', where={'Status': 'pending', 'Customer': customer}),
+        ),
+        (
+            'sum Amount by Status',
+            lambda: _group_sum(rows),
+            lambda: ws.query('SELECT Status, SUM(Amount) FROM orders GROUP BY Status'),
+        ),
+        (
+            'count Amount > 990',
+            lambda: sum(1 for r in rows if r['Amount'] > 990),
+            lambda: ws.query('SELECT COUNT(*) FROM orders WHERE Amount > 990'),
+        ),
+        (
+            'top 10 pending by Amount',
+            lambda: sorted((r for r in rows if r['Status'] == 'pending'),
+                           key=lambda r: r['Amount'], reverse=True)[:10],
+            lambda: ws.select('orders', where={'Status': 'pending'},
+                              order_by='-Amount', limit=10),
+        ),
+    ]
+
+    print(f"Workspace queries over {len(rows)} rows (mean ms)")
+    print("=" * 64)
+    print(f"One-off ingest with three indexes: {ingest_ms:.1f} ms")
+    print(f"Decoding a re-fetched sheet ({codec.name}): {fetch_ms:.1f} ms")
+    print()
+    print(f"{'query':<28} {'re-fetch+scan':>14} {'scan':>8} {'workspace':>10}")
+    for label, scan, query in cases:
+        scan_ms = timed(scan)
+        print(f"{label:<28} {fetch_ms + scan_ms:>14.2f} {scan_ms:>8.2f} {timed(query):>10.2f}")
+
+
+def _group_sum(rows):
+    totals = {}
+    for row in rows:
+        totals[row['Status']] = totals.get(row['Status'], 0) + row['Amount']
+    return totals
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Large synthetic tool payloads shared by the benchmarks"""
+
+import random
+from typing import Any, Dict, List
+
+STATUSES = ['pending', 'completed', 'shipped', 'cancelled']
+CUSTOMERS = ['Acme Corp', 'TechCo', 'StartupXYZ', 'BigCorp', 'SmallBiz']
+
+
+def make_sheet(rows: int = 100_000, seed: int = 0) -> Dict[str, Any]:
+    """A get_sheet response with `rows` order rows."""
+    rng = random.Random(seed)
+    data: List[Dict[str, Any]] = [
+        {
+            'Order ID': str(1000 + i),
+            'Status': rng.choice(STATUSES),
+            'Amount': round(rng.uniform(10, 1000), 2),
+            'Quantity': rng.randint(1, 50),
+            'Customer': rng.choice(CUSTOMERS),
+        }
+        for i in range(rows)
+    ]
+    return {'rows': data}
+
+
+def make_document(size: int = 4_000_000, seed: int = 0) -> Dict[str, Any]:
+    """A get_document response with roughly `size` characters of transcript."""
+    rng = random.Random(seed)
+    speakers = ['Alice', 'Bob', 'Carol']
+    words = ['objectives', 'customer', 'feedback', 'budget', 'resources',
+             'roadmap', 'quarter', 'priority', 'review', 'plan', 'the', 'we']
+    lines = []
+    total = 0
+    while total < size:
+        line = f"{rng.choice(speakers)}: " + ' '.join(rng.choice(words) for _ in range(14))
+        lines.append(line)
+        total += len(line) + 1
+    return {'content': '\n'.join(lines)}
+
+
+def make_leads(records: int = 100_000, seed: int = 0) -> Dict[str, Any]:
+    """A salesforce.query response with `records` leads."""
+    rng = random.Random(seed)
+    return {
+        'records': [
+            {
+                'Id': f'L{i:06d}',
+                'Email': f'contact{i}@example.com',
+                'Name': f'Lead {rng.randint(0, 10**6)}',
+            }
+            for i in range(records)
+        ]
+    }
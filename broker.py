@@ -0,0 +1,443 @@
+"""
+Local broker shared by agent processes.
+
+Every agent execution imports client.py in its own process, so server
+connections, cached responses and rate-limit budgets are normally private
+to that process. The broker is an optional long-running process that owns
+them instead and serves any number of agent processes over a Unix socket:
+
+- one set of server connections for the whole host
+- a response cache for read tools, shared by every agent; identical reads
+  that arrive while one is in flight wait for it instead of repeating it
+- per-server rate limiters that apply to all agents together
+
+client.call_mcp_tool() uses the broker automatically whenever its socket
+exists, and falls back to calling servers directly if it cannot reach it.
+
+Start it with:
+    python broker.py [--socket PATH] [--cache-ttl SECONDS]
+
+Show its statistics with:
+    python broker.py --stats
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+import client
+import runtime
+from codec import available_codecs, get_codec
+
+# Messages are JSON; orjson writes it faster when installed
+_MESSAGE_CODEC = get_codec('orjson' if 'orjson' in available_codecs() else 'json')
+_LENGTH = struct.Struct('<I')
+
+# Seconds to stop trying the broker after failing to reach it
+RETRY_AFTER = 5.0
+
+# Exception types re-raised as themselves when a tool call fails in the broker
+_ERROR_TYPES = {error.__name__: error for error in (ValueError, KeyError, TypeError, LookupError)}
+
+
+class BrokerUnavailable(Exception):
+    """Raised when a request could not be sent to the broker."""
+
+
+class BrokerReplyLost(Exception):
+    """
+    Raised when a request was sent but its reply never arrived.
+
+    The broker may have executed it, so only requests that are safe to
+    repeat should be retried elsewhere.
+    """
+
+
+def _default_dir() -> str:
+    return os.path.join(tempfile.gettempdir(), f'mcp-broker-{os.getuid()}')
+
+
+def socket_path() -> str:
+    """
+    Path of the broker socket.
+
+    $MCP_BROKER_SOCKET if set. Otherwise the socket lives in a directory
+    only the current user can access: $XDG_RUNTIME_DIR, or a 0700
+    mcp-broker-<uid> directory in the temp dir.
+    """
+    if 'MCP_BROKER_SOCKET' in os.environ:
+        return os.environ['MCP_BROKER_SOCKET']
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'mcp-broker.sock')
+    return os.path.join(_default_dir(), 'broker.sock')
+
+
+def _owned_socket(path: str) -> bool:
+    """True if path is a socket owned by the current user."""
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    # Another user could create a socket at a guessable path to receive every request
+    return stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid()
+
+
+def _private_dir(directory: str) -> None:
+    """Create directory for this user only, or check that an existing one is."""
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if (not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid()
+            or info.st_mode & 0o077):
+        raise PermissionError(f"Broker directory {directory} must be a 0700 directory owned by this user")
+
+
+_unreachable_until = 0.0
+
+
+def broker_available() -> bool:
+    """True if a broker socket owned by this user exists and has not failed recently."""
+    if os.environ.get('MCP_BROKER') == '0':
+        return False
+    return time.monotonic() >= _unreachable_until and _owned_socket(socket_path())
+
+
+def _mark_unreachable() -> None:
+    global _unreachable_until
+    _unreachable_until = time.monotonic() + RETRY_AFTER
+
+
+def encode_message(message: Any) -> bytes:
+    """Frame a message: a u32 length followed by its JSON encoding."""
+    data = _MESSAGE_CODEC.encode(message)
+    return _LENGTH.pack(len(data)) + data
+
+
+async def read_message(reader: asyncio.StreamReader) -> Any:
+    """Read one framed message. Raises asyncio.IncompleteReadError at EOF."""
+    (size,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    return _MESSAGE_CODEC.decode(await reader.readexactly(size))
+
+
+def _unwrap(reply: Dict[str, Any]) -> Any:
+    if reply.get('ok'):
+        return reply['result']
+    error = _ERROR_TYPES.get(reply.get('type', ''), RuntimeError)
+    raise error(reply.get('error', 'Broker request failed'))
+
+
+# Idle connections to the broker, per event loop
+_pools: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def request(message: Dict[str, Any]) -> Any:
+    """
+    Send a request to the broker and return its result.
+
+    Connections are pooled per event loop and reused across requests.
+
+    Raises:
+        BrokerUnavailable: If the request could not be sent to the broker
+        BrokerReplyLost: If the request was sent but no reply arrived
+    """
+    pool = _pools.setdefault(asyncio.get_running_loop(), [])
+    while pool:
+        reader, writer = pool.pop()
+        # Skip connections the broker has closed since they were last used
+        if not reader.at_eof():
+            break
+        writer.close()
+    else:
+        path = socket_path()
+        try:
+            if not _owned_socket(path):
+                raise PermissionError(f"{path} is not a socket owned by this user")
+            reader, writer = await asyncio.open_unix_connection(path)
+        except OSError as error:
+            _mark_unreachable()
+            raise BrokerUnavailable(str(error)) from error
+
+    try:
+        writer.write(encode_message(message))
+        await writer.drain()
+    except OSError as error:
+        writer.close()
+        _mark_unreachable()
+        raise BrokerUnavailable(str(error)) from error
+    except BaseException:
+        writer.close()
+        raise
+
+    try:
+        reply = await read_message(reader)
+    except (OSError, asyncio.IncompleteReadError) as error:
+        writer.close()
+        _mark_unreachable()
+        raise BrokerReplyLost(str(error)) from error
+    except BaseException:
+        # The reply may still arrive later, so the connection cannot be reused
+        writer.close()
+        raise
+
+    pool.append((reader, writer))
+    return _unwrap(reply)
+
+
+def request_sync(message: Dict[str, Any]) -> Any:
+    """Blocking variant of request() for use outside an event loop."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        path = socket_path()
+        try:
+            if not _owned_socket(path):
+                raise PermissionError(f"{path} is not a socket owned by this user")
+            sock.connect(path)
+            sock.sendall(encode_message(message))
+        except OSError as error:
+            _mark_unreachable()
+            raise BrokerUnavailable(str(error)) from error
+
+        try:
+            with sock.makefile('rb') as stream:
+                header = stream.read(_LENGTH.size)
+                if len(header) < _LENGTH.size:
+                    raise ConnectionError("Broker closed the connection")
+                (size,) = _LENGTH.unpack(header)
+                reply = _MESSAGE_CODEC.decode(stream.read(size))
+        except OSError as error:
+            _mark_unreachable()
+            raise BrokerReplyLost(str(error)) from error
+    return _unwrap(reply)
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` calls per second with bursts of `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a call is allowed."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _cache_key(tool_name: str, parameters: Dict[str, Any]) -> str:
+    return tool_name + json.dumps(parameters, sort_keys=True, default=str)
+
+
+class Broker:
+    """The broker server."""
+
+    def __init__(self, path: Optional[str] = None, cache_ttl: float = 30.0,
+                 rate_limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        """
+        Args:
+            path: Socket path (default: socket_path())
+            cache_ttl: Seconds a cached read result stays valid. 0 disables caching.
+            rate_limits: Server name -> (calls per second, burst), e.g.
+                {'salesforce': (20.0, 5)}. Servers not listed are not limited.
+        """
+        self.path = path or socket_path()
+        self.cache_ttl = cache_ttl
+        self.limiters = {server: RateLimiter(rate, burst)
+                         for server, (rate, burst) in (rate_limits or {}).items()}
+        self._cache: Dict[str, Tuple[float, Dict[str, Any], Optional[str]]] = {}
+        self._in_flight: Dict[str, 'asyncio.Future[Tuple[Dict[str, Any], Optional[str]]]'] = {}
+        # Bumped by every write to a server; reads that started under an older
+        # generation may hold pre-write data and are not cached
+        self._generations: Dict[str, int] = {}
+        self.stats = {'clients': 0, 'requests': 0, 'calls': 0,
+                      'hits': 0, 'misses': 0, 'coalesced': 0}
+
+    async def serve_forever(self) -> None:
+        """Serve until cancelled, then remove the socket."""
+        # Calls made by the broker itself go straight to the servers
+        client.USE_BROKER = False
+        if os.path.dirname(self.path) == _default_dir():
+            _private_dir(_default_dir())
+        if os.path.lexists(self.path):
+            os.remove(self.path)
+        # Create the socket as 0600 rather than tightening it after bind()
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=self.path)
+        finally:
+            os.umask(umask)
+        # Shut down cleanly on SIGTERM so the socket does not outlive the broker
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM, asyncio.current_task().cancel)  # type: ignore[union-attr]
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats['clients'] += 1
+        try:
+            while True:
+                try:
+                    message = await read_message(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                self.stats['requests'] += 1
+                try:
+                    reply = {'ok': True, 'result': await self._dispatch(message)}
+                except Exception as error:
+                    reply = {'ok': False, 'type': type(error).__name__, 'error': str(error)}
+                writer.write(encode_message(reply))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.stats['clients'] -= 1
+            writer.close()
+
+    async def _dispatch(self, message: Dict[str, Any]) -> Any:
+        op = message.get('op')
+        if op == 'call':
+            result, version = await self._call(message['tool'], message['parameters'])
+            return {'result': result, 'version': version}
+        if op == 'version':
+            return await self._version(message['tool'], message['parameters'])
+        if op == 'get_mock_updates':
+            return client.get_mock_updates()
+        if op == 'clear_mock_updates':
+            client.clear_mock_updates()
+            return None
+        if op == 'stats':
+            return dict(self.stats, cached=len(self._cache))
+        raise ValueError(f"Unknown broker operation: {op}")
+
+    async def _call(self, tool_name: str, parameters: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+        server = tool_name.split('__', 1)[0]
+        if tool_name not in client.READ_TOOLS:
+            await self._throttle(tool_name)
+            self.stats['calls'] += 1
+            try:
+                return await client.call_server(tool_name, parameters)
+            finally:
+                # The write may have changed what the server's read tools return,
+                # even if it failed part way
+                self._invalidate(server)
+
+        key = _cache_key(tool_name, parameters)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.stats['hits'] += 1
+            return cached[1], cached[2]
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(pending)
+
+        self.stats['misses'] += 1
+        generation = self._generations.get(server, 0)
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            await self._throttle(tool_name)
+            self.stats['calls'] += 1
+            result, version = await client.call_server(tool_name, parameters, want_version=True)
+        except Exception as error:
+            future.set_exception(error)
+            # Mark the exception retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+        if self.cache_ttl > 0 and self._generations.get(server, 0) == generation:
+            self._cache[key] = (time.monotonic() + self.cache_ttl, result, version)
+        future.set_result((result, version))
+        return result, version
+
+    async def _version(self, tool_name: str, parameters: Dict[str, Any]) -> Optional[str]:
+        await self._throttle(tool_name)
+        version = await client.get_tool_version(tool_name, parameters)
+        key = _cache_key(tool_name, parameters)
+        cached = self._cache.get(key)
+        if cached is not None and cached[2] != version:
+            # The data changed upstream; a caller that sees the new version and
+            # calls the tool again must not get the old result from the cache
+            del self._cache[key]
+        return version
+
+    def _invalidate(self, server: str) -> None:
+        """Forget cached and in-flight reads of a server after a write to it."""
+        self._generations[server] = self._generations.get(server, 0) + 1
+        prefix = f'{server}__'
+        for key in [k for k in self._cache if k.startswith(prefix)]:
+            del self._cache[key]
+        # Reads arriving from now on must not join a read that started before the write
+        for key in [k for k in self._in_flight if k.startswith(prefix)]:
+            del self._in_flight[key]
+
+    async def _throttle(self, tool_name: str) -> None:
+        limiter = self.limiters.get(tool_name.split('__', 1)[0])
+        if limiter is not None:
+            await limiter.acquire()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Shared MCP client broker')
+    parser.add_argument('--socket', default=None, help='socket path (default: %(default)s)')
+    parser.add_argument('--cache-ttl', type=float, default=30.0,
+                        help='seconds cached read results stay valid (default: 30)')
+    parser.add_argument('--rate-limit', action='append', default=[], metavar='SERVER=RATE[/BURST]',
+                        help='limit calls to a server, e.g. salesforce=20/5')
+    parser.add_argument('--stats', action='store_true', help='print statistics of the running broker')
+    args = parser.parse_args()
+
+    if args.socket:
+        os.environ['MCP_BROKER_SOCKET'] = args.socket
+
+    if args.stats:
+        print(json.dumps(request_sync({'op': 'stats'}), indent=2))
+        return
+
+    rate_limits: Dict[str, Tuple[float, int]] = {}
+    for spec in args.rate_limit:
+        server, _, limit = spec.partition('=')
+        rate, _, burst = limit.partition('/')
+        rate_limits[server] = (float(rate), int(burst or 1))
+
+    broker = Broker(cache_ttl=args.cache_ttl, rate_limits=rate_limits)
+    print(f"MCP broker listening on {broker.path}", file=sys.stderr)
+    try:
+        runtime.run(broker.serve_forever())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+if __name__ == '__main__':
+    main()
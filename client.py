@@ -7,7 +7,17 @@ For demonstration purposes, this includes mock implementations.
 """
 
 import asyncio
-from typing import Any, Dict, TypeVar, cast
+import contextlib
+import contextvars
+import hashlib
+import json
+import re
+import weakref
+from typing import Any, Dict, Iterator, List, Optional, Tuple, TypeVar, cast
+
+import broker
+from codec import Codec, negotiate_codec
+from compression import Compression, DEFAULT_THRESHOLD, encode_frame, iter_frame, negotiate_compression
 
 T = TypeVar('T')
 
@@ -71,6 +81,161 @@ Action Items:
 MOCK_UPDATES: list[Dict[str, Any]] = []
 
 
+# Codecs and compression algorithms the mock servers advertise
+# when a connection is opened
+MOCK_SERVER_CODECS = ('mcp-columnar', 'orjson', 'json')
+MOCK_SERVER_COMPRESSIONS = ('zstd', 'zlib')
+
+# Encoded payloads at least this many bytes are compressed on the wire
+COMPRESSION_THRESHOLD = DEFAULT_THRESHOLD
+
+
+class ServerConnection:
+    """
+    Wire settings negotiated with one MCP server.
+
+    Every request and response crosses the connection encoded with the
+    negotiated codec, and compressed when larger than the threshold,
+    just as it would over a real transport.
+    """
+
+    def __init__(self, server: str, codec: Codec, compression: Compression,
+                 threshold: int = DEFAULT_THRESHOLD):
+        self.server = server
+        self.codec = codec
+        self.compression = compression
+        self.threshold = threshold
+
+    def send(self, payload: Any) -> bytes:
+        """Encode a payload into a wire frame."""
+        return encode_frame(self.codec.encode(payload), self.compression, self.threshold)
+
+    def receive(self, frame: bytes) -> Any:
+        """Decode a wire frame, decompressing it as a stream."""
+        decoder = self.codec.decoder()
+        if decoder is not None:
+            for piece in iter_frame(frame, self.compression):
+                decoder.feed(piece)
+            return decoder.result()
+
+        data = bytearray()
+        for piece in iter_frame(frame, self.compression):
+            data += piece
+        return self.codec.decode(data)
+
+    def transfer(self, payload: Any) -> Any:
+        """Send a payload across the (simulated) wire and return what arrives."""
+        return self.receive(self.send(payload))
+
+
+_connections: Dict[str, ServerConnection] = {}
+
+# Route calls through a local broker process when one is running
+USE_BROKER = True
+
+# Maximum number of tool calls in flight at once, per event loop
+MAX_CONCURRENT_CALLS = 10
+
+_call_limits: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _call_limit() -> asyncio.Semaphore:
+    """Return the semaphore bounding concurrent tool calls on the running loop."""
+    loop = asyncio.get_running_loop()
+    limit = _call_limits.get(loop)
+    if limit is None:
+        limit = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+        _call_limits[loop] = limit
+    return limit
+
+
+def get_connection(server: str) -> ServerConnection:
+    """Return the connection for a server, negotiating it on first use."""
+    connection = _connections.get(server)
+    if connection is None:
+        connection = ServerConnection(
+            server,
+            negotiate_codec(MOCK_SERVER_CODECS),
+            negotiate_compression(MOCK_SERVER_COMPRESSIONS),
+            COMPRESSION_THRESHOLD,
+        )
+        _connections[server] = connection
+    return connection
+
+
+def reset_connections() -> None:
+    """Drop all connections so the next call renegotiates them."""
+    _connections.clear()
+
+
+# Tools that only read data, and so report a version of what they returned
+READ_TOOLS = (
+    'google_drive__get_document',
+    'google_drive__get_sheet',
+    'salesforce__query',
+    'slack__get_channel_history',
+)
+
+_tool_reads: 'contextvars.ContextVar[Optional[List[Dict[str, Any]]]]' = (
+    contextvars.ContextVar('tool_reads', default=None)
+)
+
+
+@contextlib.contextmanager
+def record_tool_reads() -> Iterator[List[Dict[str, Any]]]:
+    """
+    Record the read tool calls made inside the block.
+
+    Yields a list that receives one {'tool', 'parameters', 'version'} entry
+    per read call, including calls made by tasks started in the block.
+    Reads recorded in a nested block are also added to the enclosing one.
+    """
+    reads: List[Dict[str, Any]] = []
+    parent = _tool_reads.get()
+    token = _tool_reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _tool_reads.reset(token)
+        if parent is not None:
+            parent.extend(reads)
+
+
+async def get_tool_version(tool_name: str, parameters: Dict[str, Any]) -> Optional[str]:
+    """
+    Ask a server for the current version (ETag) of what a read tool returns.
+
+    This is a metadata-only round trip; the data itself is not transferred.
+
+    Args:
+        tool_name: The name of a read tool
+        parameters: The parameters the tool would be called with
+
+    Returns:
+        An opaque version string, or None if the tool does not report versions
+    """
+    if tool_name not in READ_TOOLS:
+        return None
+    if USE_BROKER and broker.broker_available():
+        try:
+            return await broker.request({
+                'op': 'version', 'tool': tool_name, 'parameters': parameters,
+            })
+        except (broker.BrokerUnavailable, broker.BrokerReplyLost):
+            pass
+    return await _get_server_version(tool_name, parameters)
+
+
+async def _get_server_version(tool_name: str, parameters: Dict[str, Any]) -> Optional[str]:
+    """Ask the server itself for a read tool's current version."""
+    async with _call_limit():
+        # Simulate network latency
+        await asyncio.sleep(0.1)
+        return _mock_version(tool_name, parameters)
+
+
 async def call_mcp_tool(tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
     """
     Call an MCP tool and return the result.
@@ -80,7 +245,13 @@ async def call_mcp_tool(tool_name: str, parameters: Dict[str, Any]) -> Dict[str,
     2. Send the tool call request
     3. Wait for and return the response
 
-    For demonstration, this returns mock data.
+    For demonstration, this returns mock data. Requests and responses are
+    still passed through the connection's codec. At most
+    MAX_CONCURRENT_CALLS calls are in flight at once.
+
+    When a local broker (see broker.py) is running, the call is sent to it
+    instead, so connections, cached responses and rate limits are shared
+    with other agent processes on the host.
 
     Args:
         tool_name: The name of the MCP tool to call
@@ -89,9 +260,58 @@ async def call_mcp_tool(tool_name: str, parameters: Dict[str, Any]) -> Dict[str,
     Returns:
         The tool's response as a dictionary
     """
-    # Simulate network latency
-    await asyncio.sleep(0.1)
+    reads = _tool_reads.get()
+    want_version = reads is not None and tool_name in READ_TOOLS
+
+    if USE_BROKER and broker.broker_available():
+        try:
+            reply = await broker.request({
+                'op': 'call',
+                'tool': tool_name,
+                'parameters': parameters,
+            })
+            result, version = reply['result'], reply['version']
+        except broker.BrokerUnavailable:
+            result, version = await call_server(tool_name, parameters, want_version)
+        except broker.BrokerReplyLost:
+            # The broker may already have run the call; only reads are safe to repeat
+            if tool_name not in READ_TOOLS:
+                raise
+            result, version = await call_server(tool_name, parameters, want_version)
+    else:
+        result, version = await call_server(tool_name, parameters, want_version)
 
+    if want_version:
+        reads.append({'tool': tool_name, 'parameters': parameters, 'version': version})
+    return result
+
+
+async def call_server(tool_name: str, parameters: Dict[str, Any],
+                      want_version: bool = False) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Call a tool on its server directly, bypassing any broker.
+
+    Args:
+        tool_name: The name of the MCP tool to call
+        parameters: The parameters to pass to the tool
+        want_version: Also return the version of a read tool's result
+
+    Returns:
+        The tool's response and its version (None unless requested)
+    """
+    async with _call_limit():
+        # Simulate network latency
+        await asyncio.sleep(0.1)
+
+        connection = get_connection(tool_name.split('__', 1)[0])
+        request = connection.transfer(parameters)
+        response = _call_mock_tool(tool_name, request)
+        version = _mock_version(tool_name, request) if want_version else None
+        return cast(Dict[str, Any], connection.transfer(response)), version
+
+
+def _call_mock_tool(tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Serve a tool call from the mock data."""
     # Handle different tool calls
     if tool_name == 'google_drive__get_document':
         doc_id = parameters.get('document_id', parameters.get('documentId'))
@@ -116,9 +336,17 @@ async def call_mcp_tool(tool_name: str, parameters: Dict[str, Any]) -> Dict[str,
 
     elif tool_name == 'salesforce__query':
         query = parameters.get('query', '')
-        if 'Lead' in query:
-            return {'records': MOCK_DATA['salesforce__query']['leads']}
-        return {'records': []}
+        records = MOCK_DATA['salesforce__query']['leads'] if 'Lead' in query else []
+        after = re.search(r"\bId\s*>\s*'([^']*)'", query, re.IGNORECASE)
+        if after:
+            records = [record for record in records if record['Id'] > after.group(1)]
+        if re.search(r'\bORDER\s+BY\s+Id\b', query, re.IGNORECASE):
+            records = sorted(records, key=lambda record: record['Id'])
+        offset = re.search(r'\bOFFSET\s+(\d+)', query, re.IGNORECASE)
+        limit = re.search(r'\bLIMIT\s+(\d+)', query, re.IGNORECASE)
+        start = int(offset.group(1)) if offset else 0
+        end = start + int(limit.group(1)) if limit else None
+        return {'records': records[start:end]}
 
     elif tool_name == 'slack__get_channel_history':
         channel = parameters.get('channel')
@@ -129,11 +357,28 @@ async def call_mcp_tool(tool_name: str, parameters: Dict[str, Any]) -> Dict[str,
         raise ValueError(f"Unknown tool: {tool_name}")
 
 
+def _mock_version(tool_name: str, parameters: Dict[str, Any]) -> str:
+    """Version of mock data: a hash of what the read tool would return."""
+    data = json.dumps(_call_mock_tool(tool_name, parameters), sort_keys=True, default=str)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=12).hexdigest()
+
+
 def get_mock_updates() -> list[Dict[str, Any]]:
     """Get all recorded mock updates for demonstration purposes."""
+    if USE_BROKER and broker.broker_available():
+        try:
+            return broker.request_sync({'op': 'get_mock_updates'})
+        except (broker.BrokerUnavailable, broker.BrokerReplyLost):
+            pass
     return MOCK_UPDATES.copy()
 
 
 def clear_mock_updates() -> None:
     """Clear all recorded mock updates."""
+    if USE_BROKER and broker.broker_available():
+        try:
+            broker.request_sync({'op': 'clear_mock_updates'})
+            return
+        except (broker.BrokerUnavailable, broker.BrokerReplyLost):
+            pass
     MOCK_UPDATES.clear()
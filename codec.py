@@ -0,0 +1,431 @@
+"""
+Wire codecs for MCP tool payloads.
+
+Tool results such as large sheets and documents are serialized on every call,
+so the codec is negotiated per server connection. Three codecs are provided:
+
+- ``json``: the stdlib ``json`` module, always available
+- ``orjson``: a faster JSON backend, used when ``orjson`` is installed
+- ``mcp-columnar``: a compact binary encoding for row data that can be
+  decoded incrementally, one chunk of rows at a time
+"""
+
+import json
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _stdlib_loads(data: bytes) -> Any:
+    return json.loads(data)
+
+
+# Leading whitespace is valid JSON; it marks data that orjson did not encode
+_STDLIB_MARK = b' '
+
+
+def _fast_dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # orjson rejects some values json accepts, e.g. ints beyond 64 bits
+            pass
+    return _STDLIB_MARK + _stdlib_dumps(obj)
+
+
+def _fast_loads(data: bytes) -> Any:
+    # orjson parses ints beyond 64 bits as floats, so leave anything it did
+    # not encode to the stdlib parser
+    if orjson is not None and data[:1] != _STDLIB_MARK:
+        return orjson.loads(data)
+    return _stdlib_loads(data)
+
+
+class Codec:
+    """Base class for payload codecs."""
+
+    name = ''
+
+    def encode(self, payload: Any) -> bytes:
+        """Serialize a payload to bytes."""
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:
+        """Deserialize a payload from bytes."""
+        raise NotImplementedError
+
+    def decoder(self) -> Optional['ColumnarDecoder']:
+        """Return an incremental decoder, or None if the codec has none."""
+        return None
+
+
+class JsonCodec(Codec):
+    """Codec backed by the stdlib ``json`` module."""
+
+    name = 'json'
+
+    def encode(self, payload: Any) -> bytes:
+        return _stdlib_dumps(payload)
+
+    def decode(self, data: bytes) -> Any:
+        return _stdlib_loads(data)
+
+
+class OrjsonCodec(Codec):
+    """Codec backed by ``orjson``. Only registered when it is installed."""
+
+    name = 'orjson'
+
+    def encode(self, payload: Any) -> bytes:
+        return _fast_dumps(payload)
+
+    def decode(self, data: bytes) -> Any:
+        return _fast_loads(data)
+
+
+# Layout of the columnar format:
+#
+#   MAGIC | u32 header length | header JSON | chunk | chunk | ...
+#
+# The header holds every non-row field of the payload, the key the rows live
+# under, the column names and the row count. Each chunk is
+#
+#   u32 chunk length | u32 row count | column block * len(columns)
+#
+# and each column block starts with a one-byte kind telling how it is packed.
+MAGIC = b'MCC1'
+
+_U32 = struct.Struct('<I')
+
+_KIND_INT = 0
+_KIND_FLOAT = 1
+_KIND_STR = 2
+_KIND_JSON = 3
+_KIND_SPARSE = 4
+
+_MISSING = object()
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+_SWAP_BYTES = sys.byteorder == 'big'
+
+
+def _find_rows_key(payload: Any) -> Optional[str]:
+    """Return the key of the first list-of-dicts field in a payload."""
+    if not isinstance(payload, dict):
+        return None
+    for key, value in payload.items():
+        if (isinstance(value, list) and value
+                and all(isinstance(item, dict) for item in value)):
+            return key
+    return None
+
+
+def _packed_numbers(typecode: str, values: List[Any]) -> bytes:
+    packed = array(typecode, values)
+    if _SWAP_BYTES:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpacked_numbers(typecode: str, data: bytes) -> List[Any]:
+    unpacked = array(typecode)
+    unpacked.frombytes(data)
+    if _SWAP_BYTES:
+        unpacked.byteswap()
+    return unpacked.tolist()
+
+
+def _encode_column(values: List[Any]) -> bytes:
+    if _MISSING in values:
+        present = [[i, v] for i, v in enumerate(values) if v is not _MISSING]
+        body = _fast_dumps(present)
+        return bytes([_KIND_SPARSE]) + _U32.pack(len(body)) + body
+
+    types = set(map(type, values))
+    if types == {str}:
+        text = ''.join(values)
+        blob = text.encode('utf-8')
+        lengths = _packed_numbers('I', list(map(len, values)))
+        return (bytes([_KIND_STR]) + _U32.pack(len(blob)) + blob
+                + _U32.pack(len(lengths)) + lengths)
+    if types == {float}:
+        body = _packed_numbers('d', values)
+        return bytes([_KIND_FLOAT]) + _U32.pack(len(body)) + body
+    if types == {int} and _INT64_MIN <= min(values) and max(values) <= _INT64_MAX:
+        body = _packed_numbers('q', values)
+        return bytes([_KIND_INT]) + _U32.pack(len(body)) + body
+
+    body = _fast_dumps(values)
+    return bytes([_KIND_JSON]) + _U32.pack(len(body)) + body
+
+
+def _decode_column(view: memoryview, offset: int, count: int) -> Tuple[Any, int]:
+    """Decode one column block, returning (values, new offset)."""
+    kind = view[offset]
+    offset += 1
+    (size,) = _U32.unpack_from(view, offset)
+    offset += 4
+    body = bytes(view[offset:offset + size])
+    offset += size
+
+    if kind == _KIND_STR:
+        text = body.decode('utf-8')
+        (size,) = _U32.unpack_from(view, offset)
+        offset += 4
+        lengths = _unpacked_numbers('I', bytes(view[offset:offset + size]))
+        offset += size
+        ends = list(accumulate(lengths))
+        starts = [0] + ends[:-1]
+        return [text[start:end] for start, end in zip(starts, ends)], offset
+    if kind == _KIND_FLOAT:
+        return _unpacked_numbers('d', body), offset
+    if kind == _KIND_INT:
+        return _unpacked_numbers('q', body), offset
+    if kind == _KIND_JSON:
+        return _fast_loads(body), offset
+    if kind == _KIND_SPARSE:
+        values = [_MISSING] * count
+        for index, value in _fast_loads(body):
+            values[index] = value
+        return values, offset
+    raise ValueError(f"Unknown column kind: {kind}")
+
+
+class ColumnarDecoder:
+    """
+    Incremental decoder for the ``mcp-columnar`` format.
+
+    Feed it bytes as they arrive; every call returns the rows whose chunk
+    is now complete, so large results can be processed before the whole
+    payload has been received.
+
+    Example:
+        decoder = ColumnarDecoder()
+        for data in stream:
+            for row in decoder.feed(data):
+                handle(row)
+    """
+
+    def __init__(self, collect: bool = False):
+        """
+        Args:
+            collect: Keep every decoded row so result() can rebuild the
+                full payload. Leave off when rows are consumed as they arrive.
+        """
+        self._buffer = bytearray()
+        self._header: Optional[Dict[str, Any]] = None
+        self._collect = collect
+        self._rows: List[Dict[str, Any]] = []
+        self._decoded = 0
+
+    @property
+    def header(self) -> Optional[Dict[str, Any]]:
+        """The payload header, once enough bytes have been fed."""
+        return self._header
+
+    @property
+    def done(self) -> bool:
+        """True once every row announced by the header has been decoded."""
+        return self._header is not None and self._decoded >= self._header['count']
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        """Add bytes and return any rows that could be fully decoded."""
+        self._buffer += data
+        rows: List[Dict[str, Any]] = []
+
+        if self._header is None and not self._read_header():
+            return rows
+
+        offset = 0
+        with memoryview(self._buffer) as view:
+            while len(view) - offset >= 4:
+                (size,) = _U32.unpack_from(view, offset)
+                if len(view) - offset < 4 + size:
+                    break
+                rows.extend(self._decode_chunk(view[offset + 4:offset + 4 + size]))
+                offset += 4 + size
+        # Drop consumed chunks in one go rather than once per chunk
+        del self._buffer[:offset]
+
+        self._decoded += len(rows)
+        if self._collect:
+            self._rows.extend(rows)
+        return rows
+
+    def result(self) -> Any:
+        """Return the full decoded payload. Requires ``collect=True``."""
+        if not self.done:
+            raise ValueError("Incomplete mcp-columnar payload")
+        payload = self._header['payload']
+        rows_key = self._header['rows_key']
+        if rows_key is not None:
+            payload = dict(payload)
+            payload[rows_key] = self._rows
+            # Restore the original key order of the envelope
+            payload = {key: payload[key] for key in self._header['order']}
+        return payload
+
+    def _read_header(self) -> bool:
+        if len(self._buffer) < 8:
+            return False
+        if bytes(self._buffer[:4]) != MAGIC:
+            raise ValueError("Not an mcp-columnar payload")
+        (size,) = _U32.unpack_from(self._buffer, 4)
+        if len(self._buffer) < 8 + size:
+            return False
+        self._header = _fast_loads(bytes(self._buffer[8:8 + size]))
+        del self._buffer[:8 + size]
+        return True
+
+    def _decode_chunk(self, chunk: memoryview) -> List[Dict[str, Any]]:
+        columns = self._header['columns']
+        (count,) = _U32.unpack_from(chunk, 0)
+        offset = 4
+        values = []
+        sparse = False
+        for _ in columns:
+            column, offset = _decode_column(chunk, offset, count)
+            values.append(column)
+            sparse = sparse or _MISSING in column
+
+        if not columns:
+            return [{} for _ in range(count)]
+        rows = [dict(zip(columns, row)) for row in zip(*values)]
+        if sparse:
+            for row in rows:
+                for key in [k for k, v in row.items() if v is _MISSING]:
+                    del row[key]
+        return rows
+
+
+class ColumnarCodec(Codec):
+    """
+    Compact binary codec for row data.
+
+    The first list-of-dicts field of a payload (``rows``, ``records``,
+    ``messages``, ...) is stored column-wise in chunks of ``chunk_rows``
+    rows, with numbers and strings packed as arrays. Every other field goes
+    into a small JSON header, so any payload round-trips.
+    """
+
+    name = 'mcp-columnar'
+
+    def __init__(self, chunk_rows: int = 4096):
+        self.chunk_rows = chunk_rows
+
+    def encode(self, payload: Any) -> bytes:
+        return b''.join(self.iter_encode(payload))
+
+    def iter_encode(self, payload: Any) -> Iterator[bytes]:
+        """Encode a payload as a sequence of byte blocks, one per chunk."""
+        rows_key = _find_rows_key(payload)
+        rows: List[Dict[str, Any]] = payload[rows_key] if rows_key is not None else []
+
+        columns: Dict[str, None] = {}
+        for row in rows:
+            for key in row:
+                if key not in columns:
+                    columns[key] = None
+
+        if rows_key is not None:
+            envelope = {k: v for k, v in payload.items() if k != rows_key}
+            order = list(payload)
+        else:
+            envelope = payload
+            order = None
+
+        header = _fast_dumps({
+            'payload': envelope,
+            'rows_key': rows_key,
+            'order': order,
+            'columns': list(columns),
+            'count': len(rows),
+        })
+        yield MAGIC + _U32.pack(len(header)) + header
+
+        for start in range(0, len(rows), self.chunk_rows):
+            chunk = rows[start:start + self.chunk_rows]
+            parts = [_U32.pack(len(chunk))]
+            dense = all(len(row) == len(columns) for row in chunk)
+            for column in columns:
+                if dense:
+                    values = list(map(itemgetter(column), chunk))
+                else:
+                    values = [row.get(column, _MISSING) for row in chunk]
+                parts.append(_encode_column(values))
+            body = b''.join(parts)
+            yield _U32.pack(len(body)) + body
+
+    def decode(self, data: bytes) -> Any:
+        decoder = ColumnarDecoder(collect=True)
+        decoder.feed(data)
+        return decoder.result()
+
+    def decoder(self) -> ColumnarDecoder:
+        return ColumnarDecoder(collect=True)
+
+
+def iter_rows(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """Yield rows from an ``mcp-columnar`` byte stream as they are decoded."""
+    decoder = ColumnarDecoder()
+    for data in chunks:
+        yield from decoder.feed(data)
+
+
+def _build_registry() -> Dict[str, Codec]:
+    codecs: List[Codec] = [ColumnarCodec(), JsonCodec()]
+    if orjson is not None:
+        codecs.append(OrjsonCodec())
+    return {codec.name: codec for codec in codecs}
+
+
+CODECS: Dict[str, Codec] = _build_registry()
+
+# Preferred codecs, best first. Names that are not installed are skipped.
+DEFAULT_CODEC_PREFERENCE: Tuple[str, ...] = ('orjson', 'mcp-columnar', 'json')
+
+
+def available_codecs() -> List[str]:
+    """Names of the codecs that can be used in this process."""
+    return [name for name in DEFAULT_CODEC_PREFERENCE if name in CODECS]
+
+
+def get_codec(name: str) -> Codec:
+    """Look up a codec by name."""
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown or unavailable codec: {name}") from None
+
+
+def negotiate_codec(offered: Iterable[str],
+                    preference: Optional[Sequence[str]] = None) -> Codec:
+    """
+    Pick the codec to use with a peer.
+
+    Args:
+        offered: Codec names the peer supports
+        preference: Local preference order (default: DEFAULT_CODEC_PREFERENCE)
+
+    Returns:
+        The most preferred codec both sides support. Falls back to stdlib
+        ``json``, which every peer is expected to speak.
+    """
+    offered = set(offered)
+    for name in preference or DEFAULT_CODEC_PREFERENCE:
+        if name in offered and name in CODECS:
+            return CODECS[name]
+    return CODECS['json']
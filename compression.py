@@ -0,0 +1,192 @@
+"""
+Transparent compression for large MCP payloads.
+
+Payloads above a size threshold are compressed with the algorithm negotiated
+for the connection (zstd when ``zstandard`` is installed, otherwise zlib).
+Smaller payloads are sent as-is, since compressing them costs more CPU than
+it saves on the wire.
+
+Every payload travels as a frame: a one-byte flag followed by the body.
+Decompression is streamed in bounded pieces straight into the decoder, so a
+large result is never held as an intermediate decompressed copy.
+"""
+
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore
+
+# Frame flags
+RAW = 0
+COMPRESSED = 1
+
+# Payloads smaller than this many bytes are not compressed
+DEFAULT_THRESHOLD = 64 * 1024
+
+# Size of the decompressed pieces yielded while streaming
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+class Compression:
+    """Base class for compression algorithms."""
+
+    name = ''
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a whole payload."""
+        raise NotImplementedError
+
+    def iter_decompress(self, data: memoryview,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Decompress a payload, yielding pieces of at most chunk_size bytes."""
+        raise NotImplementedError
+
+
+class Identity(Compression):
+    """No compression. Always available."""
+
+    name = 'identity'
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def iter_decompress(self, data: memoryview,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        for start in range(0, len(data), chunk_size):
+            yield bytes(data[start:start + chunk_size])
+
+
+class Zlib(Compression):
+    """zlib (deflate) from the standard library."""
+
+    name = 'zlib'
+
+    def __init__(self, level: int = 1):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def iter_decompress(self, data: memoryview,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        decompressor = zlib.decompressobj()
+        for start in range(0, len(data), chunk_size):
+            pending = data[start:start + chunk_size]
+            while pending:
+                piece = decompressor.decompress(pending, chunk_size)
+                if piece:
+                    yield piece
+                pending = decompressor.unconsumed_tail
+        while not decompressor.eof:
+            piece = decompressor.decompress(b'', chunk_size)
+            if not piece:
+                break
+            yield piece
+        if not decompressor.eof:
+            raise ValueError("Truncated zlib payload")
+
+
+class Zstd(Compression):
+    """Zstandard via the ``zstandard`` package. Only registered when installed."""
+
+    name = 'zstd'
+
+    def __init__(self, level: int = 3):
+        self.level = level
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def iter_decompress(self, data: memoryview,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        yield from self._decompressor.read_to_iter(
+            data, read_size=chunk_size, write_size=chunk_size)
+
+
+def _build_registry() -> Dict[str, Compression]:
+    algorithms: List[Compression] = [Zlib(), Identity()]
+    if zstandard is not None:
+        algorithms.append(Zstd())
+    return {algorithm.name: algorithm for algorithm in algorithms}
+
+
+COMPRESSIONS: Dict[str, Compression] = _build_registry()
+
+# Preferred algorithms, best first. Names that are not installed are skipped.
+DEFAULT_COMPRESSION_PREFERENCE: Tuple[str, ...] = ('zstd', 'zlib', 'identity')
+
+
+def available_compressions() -> List[str]:
+    """Names of the compression algorithms that can be used in this process."""
+    return [name for name in DEFAULT_COMPRESSION_PREFERENCE if name in COMPRESSIONS]
+
+
+def get_compression(name: str) -> Compression:
+    """Look up a compression algorithm by name."""
+    try:
+        return COMPRESSIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown or unavailable compression: {name}") from None
+
+
+def negotiate_compression(offered: Iterable[str],
+                          preference: Optional[Sequence[str]] = None) -> Compression:
+    """
+    Pick the compression algorithm to use with a peer.
+
+    Args:
+        offered: Algorithm names the peer supports
+        preference: Local preference order (default: DEFAULT_COMPRESSION_PREFERENCE)
+
+    Returns:
+        The most preferred algorithm both sides support, or identity.
+    """
+    offered = set(offered)
+    for name in preference or DEFAULT_COMPRESSION_PREFERENCE:
+        if name in offered and name in COMPRESSIONS:
+            return COMPRESSIONS[name]
+    return COMPRESSIONS['identity']
+
+
+def encode_frame(data: bytes, compression: Compression,
+                 threshold: int = DEFAULT_THRESHOLD) -> bytes:
+    """
+    Wrap an encoded payload in a frame, compressing it if it is large enough.
+
+    Args:
+        data: The encoded payload
+        compression: The negotiated algorithm
+        threshold: Minimum payload size in bytes worth compressing
+
+    Returns:
+        The frame to put on the wire
+    """
+    if len(data) >= threshold and compression.name != 'identity':
+        compressed = compression.compress(data)
+        # Incompressible data is cheaper to send raw
+        if len(compressed) < len(data):
+            return bytes([COMPRESSED]) + compressed
+    return bytes([RAW]) + data
+
+
+def iter_frame(frame: bytes, compression: Compression,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Stream the payload out of a frame in pieces of at most chunk_size bytes.
+
+    Feed the pieces to an incremental decoder, or into a single buffer,
+    so the decompressed payload is only ever built once.
+    """
+    view = memoryview(frame)
+    flag = view[0]
+    if flag == RAW:
+        yield from COMPRESSIONS['identity'].iter_decompress(view[1:], chunk_size)
+    elif flag == COMPRESSED:
+        yield from compression.iter_decompress(view[1:], chunk_size)
+    else:
+        raise ValueError(f"Unknown frame flag: {flag}")
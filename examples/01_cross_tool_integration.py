@@ -8,13 +8,13 @@ Key benefit: The large transcript never passes through the model's context windo
 it flows directly from Google Drive to Salesforce within the execution environment.
 """
 
-import asyncio
 import sys
 import os
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import runtime
 from servers import google_drive, salesforce
 from client import get_mock_updates, clear_mock_updates
 
@@ -77,4 +77,4 @@ async def process_meeting_transcript():
 
 
 if __name__ == '__main__':
-    asyncio.run(process_meeting_transcript())
+    runtime.run(process_meeting_transcript())
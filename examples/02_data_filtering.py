@@ -8,13 +8,13 @@ Key benefit: Instead of loading thousands of rows into context, the agent
 processes them locally and only presents relevant summaries.
 """
 
-import asyncio
 import sys
 import os
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import runtime
 from servers import google_drive
 
 
@@ -72,4 +72,4 @@ async def filter_pending_orders():
 
 
 if __name__ == '__main__':
-    asyncio.run(filter_pending_orders())
+    runtime.run(filter_pending_orders())
@@ -15,6 +15,7 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import runtime
 from servers import slack
 
 
@@ -75,4 +76,4 @@ async def wait_for_deployment():
 
 
 if __name__ == '__main__':
-    asyncio.run(wait_for_deployment())
+    runtime.run(wait_for_deployment())
@@ -7,15 +7,15 @@ Key benefit: Agents can save progress and resume work across multiple executions
 enabling long-running workflows and better resource utilization.
 """
 
-import asyncio
-import csv
 import os
 import sys
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from servers import salesforce
+import runtime
+from jobs import ExportJob, salesforce_pages
+from workspace_io import read_csv
 
 
 async def export_leads():
@@ -26,56 +26,51 @@ async def export_leads():
     - Processed later
     - Shared with other tools
     - Used across multiple agent executions
+
+    The export runs as a resumable job: every page is appended to the CSV
+    and committed to a manifest, so an interrupted export continues from the
+    last committed page instead of re-querying Salesforce from the start.
+    A finished export is not resumed; the next run exports current leads.
     """
     print("Example 4: State Persistence")
     print("=" * 60)
     print()
 
-    # Ensure workspace directory exists
-    os.makedirs('./workspace', exist_ok=True)
-
-    # Query leads from Salesforce
-    print("Querying leads from Salesforce...")
-    result = await salesforce.query({
-        'query': 'SELECT Id, Email, Name FROM Lead LIMIT 1000'
-    })
-    leads = result['records']
-
-    print(f"Retrieved {len(leads)} leads")
-    print()
-
-    # Save to CSV
     csv_path = './workspace/leads.csv'
-    print(f"Saving to {csv_path}...")
-
-    with open(csv_path, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=['Id', 'Email', 'Name'])
-        writer.writeheader()
-        for lead in leads:
-            writer.writerow(lead)
-
-    print(f"✓ Saved {len(leads)} leads to CSV")
-    print()
-
-    # Demonstrate reading it back
-    print("Reading back from saved file...")
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
-        saved_leads = list(reader)
-
-    print(f"✓ Successfully loaded {len(saved_leads)} leads from disk")
+    job = ExportJob(
+        'leads-export',
+        salesforce_pages('SELECT Id, Email, Name FROM Lead', page_size=1000),
+        csv_path,
+        fieldnames=['Id', 'Email', 'Name'],
+    )
+
+    previous = job.load_manifest()
+    if previous is not None and previous['status'] == 'complete':
+        # Resuming is for interrupted runs; a new run wants the current leads
+        print(f"Last export finished ({previous['rows']} leads), exporting current leads...")
+        job.reset()
+    elif previous is not None:
+        print(f"Resuming export after {previous['pages']} committed pages...")
+    else:
+        print("Exporting leads from Salesforce...")
+
+    manifest = await job.run()
+
+    print(f"✓ Saved {manifest['rows']} leads to {csv_path} "
+          f"in {manifest['pages']} page(s)")
     print()
 
-    # Show sample data
+    # The manifest already records what was written, so only a sample is read back
     print("Sample leads:")
-    for lead in saved_leads[:3]:
+    for lead in await read_csv(csv_path, limit=3):
         print(f"  - {lead['Name']} ({lead['Email']})")
 
     print()
     print("Key insight: The data is now persisted on disk.")
-    print("A future execution can pick up from here without re-querying Salesforce.")
+    print("If an export is interrupted, the next execution resumes it from the last")
+    print("committed page instead of re-querying Salesforce from the start.")
     print("This enables long-running workflows and better resource management.")
 
 
 if __name__ == '__main__':
-    asyncio.run(export_leads())
+    runtime.run(export_leads())
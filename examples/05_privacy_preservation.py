@@ -7,13 +7,13 @@ Key benefit: PII and other sensitive information stays in the execution environm
 never being exposed to the model. This is crucial for compliance and security.
 """
 
-import asyncio
 import sys
 import os
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import runtime
 from servers import google_drive, salesforce
 from client import get_mock_updates, clear_mock_updates
 
@@ -81,4 +81,4 @@ async def sync_customer_data():
 
 
 if __name__ == '__main__':
-    asyncio.run(sync_customer_data())
+    runtime.run(sync_customer_data())
@@ -7,13 +7,13 @@ Key benefit: Build a library of tested, reusable skills that can be composed
 into more complex workflows. This improves reliability and reduces development time.
 """
 
-import asyncio
 import sys
 import os
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import runtime
 from skills import save_sheet_as_csv
 
 
@@ -71,4 +71,4 @@ async def use_reusable_skill():
 
 
 if __name__ == '__main__':
-    asyncio.run(use_reusable_skill())
+    runtime.run(use_reusable_skill())
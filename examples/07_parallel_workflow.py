@@ -0,0 +1,101 @@
+"""
+Example 7: Parallel Workflows
+
+Demonstrates declaring tool calls as a workflow of steps with data
+dependencies instead of a fixed sequence of awaits.
+
+Key benefit: Independent tool calls run concurrently, and completed steps
+are checkpointed so a failed run resumes without repeating expensive calls.
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import runtime
+from servers import google_drive, salesforce
+from client import get_mock_updates, clear_mock_updates
+from workflow import Workflow
+
+
+def build_workflow() -> Workflow:
+    """
+    Attach a meeting transcript and the pending order total to every lead.
+
+    Fetching the transcript, the order sheet and the leads are independent,
+    so they run at the same time. Each lead update only waits for the
+    data it needs.
+    """
+    flow = Workflow('lead-briefing', checkpoint_dir='./workspace/checkpoints')
+
+    @flow.step()
+    async def transcript():
+        result = await google_drive.get_document({'document_id': 'abc123'})
+        return result['content']
+
+    @flow.step()
+    async def orders():
+        result = await google_drive.get_sheet({'sheet_id': 'abc123'})
+        return result['rows']
+
+    @flow.step()
+    async def leads():
+        result = await salesforce.query({'query': 'SELECT Id, Email, Name FROM Lead'})
+        return result['records']
+
+    @flow.step(depends_on=['orders'])
+    async def pending_total(orders):
+        return sum(row['Amount'] for row in orders if row['Status'] == 'pending')
+
+    @flow.step(depends_on=['transcript', 'pending_total', 'leads'])
+    async def briefings(transcript, pending_total, leads):
+        results = await asyncio.gather(*[
+            salesforce.update_record({
+                'object_type': 'Lead',
+                'record_id': lead['Id'],
+                'data': {'Notes': transcript, 'PendingOrders': pending_total},
+            })
+            for lead in leads
+        ])
+        return [result['record_id'] for result in results]
+
+    return flow
+
+
+async def run_parallel_workflow():
+    """Run the workflow and show how long it took."""
+    print("Example 7: Parallel Workflows")
+    print("=" * 60)
+    print()
+
+    clear_mock_updates()
+    flow = build_workflow()
+
+    print("Steps:")
+    for step in flow.steps.values():
+        after = f" (after {', '.join(step.depends_on)})" if step.depends_on else ""
+        print(f"  - {step.name}{after}")
+    print()
+
+    start = time.perf_counter()
+    results = await flow.run()
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ Workflow finished in {elapsed:.2f}s")
+    print(f"  Pending order total: ${results['pending_total']:.2f}")
+    print(f"  Briefed leads: {', '.join(results['briefings'])}")
+    print(f"  Recorded updates: {len(get_mock_updates())}")
+    print()
+
+    print("Key insight: The three fetches ran concurrently and the lead updates")
+    print("were sent together, so the run took two round trips instead of six.")
+    print("Had a step failed, its completed dependencies would have been")
+    print("checkpointed and reused on the next run.")
+
+
+if __name__ == '__main__':
+    runtime.run(run_parallel_workflow())
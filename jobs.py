@@ -0,0 +1,191 @@
+"""
+Resumable export jobs.
+
+An ExportJob pages through a data source and appends every page to a CSV
+file. After each page it commits a manifest recording the cursor to fetch
+next and the size of the output at that point:
+
+- the output file is append-only; a page is written and fsynced before the
+  manifest that covers it is committed
+- the manifest is replaced atomically, so it always describes a complete,
+  durable prefix of the output
+- all disk writes and fsyncs run in worker threads (workspace_io), so
+  they do not hold up other tool calls
+- a restarted job truncates any partial page written after the last commit
+  and continues from the committed cursor instead of starting over
+
+Example:
+    job = ExportJob(
+        'leads-export',
+        salesforce_pages('SELECT Id, Email, Name FROM Lead', page_size=2000),
+        './workspace/leads.csv',
+        fieldnames=['Id', 'Email', 'Name'],
+    )
+    manifest = await job.run()
+"""
+
+import json
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypedDict
+
+from servers import salesforce
+from workspace_io import AsyncFile, atomic_write, format_csv, write_bytes
+
+# Fetches one page given a cursor (None for the first page) and returns the
+# page's rows and the cursor of the next page (None after the last page)
+PageFetcher = Callable[[Any], Awaitable[Tuple[List[Dict[str, Any]], Any]]]
+
+
+class JobManifest(TypedDict):
+    """Committed progress of an export job"""
+    job_id: str
+    output_path: str
+    fieldnames: List[str]
+    cursor: Any
+    pages: int
+    rows: int
+    bytes: int
+    status: str
+    updated_at: float
+
+
+def _soql_string(value: str) -> str:
+    escaped = value.replace('\\', '\\\\').replace("'", "\\'")
+    return f"'{escaped}'"
+
+
+def salesforce_pages(soql: str, page_size: int = 2000) -> PageFetcher:
+    """
+    Page through a Salesforce query by record Id (keyset paging).
+
+    Each page is requested as ``... WHERE Id > :last ORDER BY Id LIMIT n``,
+    with the last Id of the previous page as the cursor. Pages therefore
+    have a stable order across a resume, and there is no OFFSET, which SOQL
+    caps at 2,000 rows.
+
+    Args:
+        soql: Query selecting Id, with an optional WHERE clause and no
+            ORDER BY, LIMIT or OFFSET clauses
+        page_size: Records per page
+
+    Returns:
+        A page fetcher whose cursor is the last Id already fetched
+    """
+    # Split off an existing WHERE clause so the Id condition can be ANDed to it
+    head, *where = re.split(r'\bWHERE\b', soql, maxsplit=1, flags=re.IGNORECASE)
+    condition = where[0].strip() if where else ''
+
+    async def fetch_page(cursor: Any) -> Tuple[List[Dict[str, Any]], Any]:
+        conditions = [f'({condition})'] if condition else []
+        if cursor is not None:
+            conditions.append(f'Id > {_soql_string(cursor)}')
+        query = head.strip()
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        result = await salesforce.query({'query': f'{query} ORDER BY Id LIMIT {page_size}'})
+        records = result['records']
+        next_cursor = records[-1]['Id'] if len(records) == page_size else None
+        return records, next_cursor
+
+    return fetch_page
+
+
+class ExportJob:
+    """An export that survives crashes and restarts."""
+
+    def __init__(self, job_id: str, fetch_page: PageFetcher, output_path: str,
+                 fieldnames: List[str], manifest_path: Optional[str] = None):
+        """
+        Args:
+            job_id: Name of the job, stored in the manifest
+            fetch_page: Function returning one page of rows per call
+            output_path: CSV file the rows are appended to
+            fieldnames: CSV columns. Extra fields in the rows are ignored.
+            manifest_path: Where to keep progress (default: next to the output)
+        """
+        self.job_id = job_id
+        self.fetch_page = fetch_page
+        self.output_path = output_path
+        self.fieldnames = list(fieldnames)
+        self.manifest_path = manifest_path or f'{output_path}.manifest.json'
+
+    def load_manifest(self) -> Optional[JobManifest]:
+        """Return the last committed manifest, or None if the job never started."""
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)
+
+    async def run(self) -> JobManifest:
+        """
+        Run the job to completion, resuming from the last committed page.
+
+        Returns:
+            The final manifest. A job that already completed returns its
+            manifest without fetching anything.
+        """
+        manifest = self.load_manifest()
+        if manifest is not None and manifest['fieldnames'] != self.fieldnames:
+            raise ValueError(
+                f"Job '{self.job_id}' was started with columns {manifest['fieldnames']}; "
+                f"call reset() to start over with new columns"
+            )
+
+        if manifest is None:
+            manifest = await self._start()
+        if manifest['status'] == 'complete':
+            return manifest
+
+        async with await AsyncFile.open(self.output_path, 'r+b') as output:
+            # Anything past the committed size is a page the last run never committed
+            await output.truncate(manifest['bytes'])
+            await output.seek(manifest['bytes'])
+
+            while manifest['status'] != 'complete':
+                rows, next_cursor = await self.fetch_page(manifest['cursor'])
+                await output.write(format_csv(rows, self.fieldnames, extrasaction='ignore'))
+                await output.sync()
+
+                manifest['cursor'] = next_cursor
+                manifest['pages'] += 1
+                manifest['rows'] += len(rows)
+                manifest['bytes'] = output.tell()
+                if next_cursor is None:
+                    manifest['status'] = 'complete'
+                await self._commit(manifest)
+
+        return manifest
+
+    def reset(self) -> None:
+        """Forget all progress so the next run starts from the beginning."""
+        for path in (self.manifest_path, self.output_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def _start(self) -> JobManifest:
+        directory = os.path.dirname(self.output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        data = format_csv([], self.fieldnames, header=True)
+        await write_bytes(self.output_path, data, fsync=True)
+
+        manifest: JobManifest = {
+            'job_id': self.job_id,
+            'output_path': self.output_path,
+            'fieldnames': self.fieldnames,
+            'cursor': None,
+            'pages': 0,
+            'rows': 0,
+            'bytes': len(data),
+            'status': 'running',
+            'updated_at': time.time(),
+        }
+        await self._commit(manifest)
+        return manifest
+
+    async def _commit(self, manifest: JobManifest) -> None:
+        manifest['updated_at'] = time.time()
+        await atomic_write(self.manifest_path, json.dumps(manifest))
@@ -0,0 +1,347 @@
+"""
+Offloading CPU-bound and blocking work from the event loop.
+
+Code that runs on the event loop stalls every in-flight tool call until it
+returns. Filtering a large row list, writing a big CSV or scanning a long
+transcript with regular expressions can take long enough to matter.
+offload() sends such work to a managed pool instead:
+
+- kind='io' runs it in a thread pool. Use this for blocking I/O (file
+  writes, SQLite). It works with any callable.
+- kind='cpu' runs it in a process pool, so it does not hold the GIL of the
+  agent process. Workers are started with forkserver (or spawn), never
+  by forking the threaded agent process. The function and its arguments
+  must therefore be picklable: use a function defined at module level,
+  and start scripts under ``if __name__ == '__main__':``.
+
+Work smaller than INLINE_LIMIT runs inline, where a pool round trip would
+cost more than it saves.
+
+Row lists are expensive to pickle. select_rows() instead copies just the
+columns it needs into one shared memory block (SharedColumns). Worker
+processes read them from that block without copying, and return only the
+indices of matching rows.
+
+Example:
+    def pending(columns):
+        return [i for i, status in enumerate(columns['Status']) if status == 'pending']
+
+    rows = await select_rows(rows, pending, ['Status'])
+    await offload(write_csv, path, rows, size=len(rows), kind='io')
+"""
+
+import asyncio
+import atexit
+import contextlib
+import functools
+import math
+import multiprocessing
+import os
+import struct
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# Work with fewer items than this runs inline on the event loop
+INLINE_LIMIT = 10_000
+
+# Worker counts of the managed pools
+THREAD_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+PROCESS_WORKERS = os.cpu_count() or 1
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def thread_pool() -> ThreadPoolExecutor:
+    """The managed thread pool, created on first use."""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(THREAD_WORKERS, thread_name_prefix='offload')
+    return _thread_pool
+
+
+def process_pool() -> ProcessPoolExecutor:
+    """The managed process pool, created on first use."""
+    global _process_pool
+    if _process_pool is None:
+        # Workers must share our resource tracker, or each one would try to
+        # free the shared memory blocks it attached to when it exits
+        resource_tracker.ensure_running()
+        # Forking a process that runs threads (the thread pool, the runtime
+        # watchdog) can deadlock the child on a lock held by another thread
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        _process_pool = ProcessPoolExecutor(PROCESS_WORKERS, mp_context=context)
+    return _process_pool
+
+
+def shutdown() -> None:
+    """Shut down the managed pools. They are created again on next use."""
+    global _thread_pool, _process_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown()
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown()
+        _process_pool = None
+
+
+atexit.register(shutdown)
+
+
+async def _run_in(executor: Executor, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    call = functools.partial(func, *args, **kwargs) if kwargs else func
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, call, *(() if kwargs else args))
+
+
+async def to_thread(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run func(*args, **kwargs) in the managed thread pool."""
+    return await _run_in(thread_pool(), func, *args, **kwargs)
+
+
+async def to_process(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run func(*args, **kwargs) in the managed process pool."""
+    return await _run_in(process_pool(), func, *args, **kwargs)
+
+
+async def offload(func: Callable[..., T], *args: Any, size: Optional[int] = None,
+                  kind: str = 'io', **kwargs: Any) -> T:
+    """
+    Run func(*args, **kwargs) off the event loop when the work is large.
+
+    Args:
+        func: Function to run
+        size: Amount of work, e.g. the number of rows. Below INLINE_LIMIT
+            func runs inline. None always offloads.
+        kind: 'io' for the thread pool, 'cpu' for the process pool
+
+    Returns:
+        What func returned
+    """
+    if kind not in ('io', 'cpu'):
+        raise ValueError(f"Unknown offload kind: {kind}")
+    if size is not None and size < INLINE_LIMIT:
+        return func(*args, **kwargs)
+    if kind == 'cpu':
+        return await to_process(func, *args, **kwargs)
+    return await to_thread(func, *args, **kwargs)
+
+
+class _NumberColumn(Sequence[Any]):
+    """A read-only int64 or float64 column over a memoryview."""
+
+    def __init__(self, values: memoryview):
+        self._values = values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return self._values[index].tolist()
+        return self._values[index]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._values)
+
+
+class _StrColumn(Sequence[str]):
+    """A string column stored as UTF-8 bytes plus end offsets."""
+
+    def __init__(self, ends: memoryview, data: memoryview):
+        self._ends = ends
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        start = self._ends[index - 1] if index > 0 else 0
+        return str(self._data[start:self._ends[index]], 'utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        text = str(self._data, 'utf-8')
+        if text.isascii():
+            # Byte offsets are character offsets, so slice the decoded text
+            start = 0
+            for end in self._ends:
+                yield text[start:end]
+                start = end
+        else:
+            for index in range(len(self)):
+                yield self[index]
+
+
+def _column(values: List[Any]) -> Tuple[str, List[Any]]:
+    """Pick a storage kind for a column and convert its values to it."""
+    if all(type(value) is int and -2**63 <= value < 2**63 for value in values):
+        return 'q', values
+    if all(value is None or type(value) in (int, float) for value in values):
+        return 'd', [math.nan if value is None else value for value in values]
+    return 's', ['' if value is None else str(value) for value in values]
+
+
+def _encode_column(values: List[Any]) -> Tuple[str, bytes, bytes]:
+    """Store a column as (kind, string end offsets, data)."""
+    kind, values = _column(values)
+    if kind != 's':
+        return kind, b'', array(kind, values).tobytes()
+    encoded = [value.encode('utf-8') for value in values]
+    ends = array('q')
+    end = 0
+    for item in encoded:
+        end += len(item)
+        ends.append(end)
+    return kind, ends.tobytes(), b''.join(encoded)
+
+
+# (field, kind, offset, count, data size) per column; kind is 'd', 'q' or 's'
+_Layout = List[Tuple[str, str, int, int, int]]
+
+
+class SharedColumns:
+    """
+    Columns of a row list copied into one shared memory block.
+
+    Numeric columns are stored as int64 or float64 arrays (None becomes NaN).
+    Any other column is stored as text (None becomes ''). Instances pickle
+    as the block name, so they can be passed to worker processes cheaply.
+    The creating process owns the block and must close() it; use it as a
+    context manager.
+    """
+
+    def __init__(self, name: str, layout: _Layout, count: int):
+        self.name = name
+        self.layout = layout
+        self.count = count
+        self._memory: Optional[shared_memory.SharedMemory] = None
+        self._owner = False
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[str, Any]], fields: Sequence[str]) -> 'SharedColumns':
+        """Copy `fields` of every row into a new shared memory block."""
+        blocks = [(field, *_encode_column([row.get(field) for row in rows])) for field in fields]
+
+        layout: _Layout = []
+        offset = 0
+        for field, kind, ends, data in blocks:
+            layout.append((field, kind, offset, len(rows), len(data)))
+            # Keep every block 8-byte aligned for the memoryview casts
+            offset += len(ends) + len(data)
+            offset += -offset % 8
+
+        memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (field, kind, start, _, _), (_, _, ends, data) in zip(layout, blocks):
+            memory.buf[start:start + len(ends)] = ends
+            memory.buf[start + len(ends):start + len(ends) + len(data)] = data
+
+        shared = cls(memory.name, layout, len(rows))
+        shared._memory = memory
+        shared._owner = True
+        return shared
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {'name': self.name, 'layout': self.layout, 'count': self.count}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state['name'], state['layout'], state['count'])  # type: ignore[misc]
+
+    @contextlib.contextmanager
+    def columns(self) -> Iterator[Dict[str, Sequence[Any]]]:
+        """
+        Map each field to a read-only view of its column.
+
+        The views are only valid inside the with block.
+        """
+        memory = self._memory or shared_memory.SharedMemory(name=self.name)
+        views: List[memoryview] = []
+
+        def view(start: int, size: int, fmt: Optional[str] = None) -> memoryview:
+            region = memory.buf[start:start + size]
+            views.append(region)
+            if fmt is not None:
+                region = region.cast(fmt)
+                views.append(region)
+            return region
+
+        try:
+            columns: Dict[str, Sequence[Any]] = {}
+            for field, kind, start, count, size in self.layout:
+                width = struct.calcsize('q')
+                if kind == 's':
+                    columns[field] = _StrColumn(view(start, count * width, 'q'),
+                                                view(start + count * width, size))
+                else:
+                    columns[field] = _NumberColumn(view(start, size, kind))
+            yield columns
+        finally:
+            for region in reversed(views):
+                region.release()
+            if memory is not self._memory:
+                memory.close()
+
+    def close(self) -> None:
+        """Release the block; the creating process also frees it."""
+        if self._memory is not None:
+            self._memory.close()
+            if self._owner:
+                self._memory.unlink()
+            self._memory = None
+
+    def __enter__(self) -> 'SharedColumns':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _select(func: Callable[[Dict[str, Sequence[Any]]], Sequence[int]],
+            shared: SharedColumns) -> List[int]:
+    with shared.columns() as columns:
+        return list(func(columns))
+
+
+async def select_rows(rows: List[Dict[str, Any]],
+                      func: Callable[[Dict[str, Sequence[Any]]], Sequence[int]],
+                      fields: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Select rows with a CPU-bound function run in the process pool.
+
+    Only `fields` are sent to the worker, as shared memory columns.
+    func(columns) returns the indices of the rows to keep, and must be
+    defined at module level. Short row lists are handled inline. Either
+    way each column is a read-only sequence: ints, floats (None becomes
+    NaN) or strings (None becomes '').
+
+    Args:
+        rows: Rows to select from
+        func: Maps {field: column} to the indices of the rows to keep
+        fields: Fields func reads
+
+    Returns:
+        The selected rows, in the order of the returned indices
+    """
+    if len(rows) < INLINE_LIMIT:
+        # The same column types the worker processes see, without shared memory
+        columns: Dict[str, Sequence[Any]] = {}
+        for field in fields:
+            kind, ends, data = _encode_column([row.get(field) for row in rows])
+            if kind == 's':
+                columns[field] = _StrColumn(memoryview(ends).cast('q'), memoryview(data))
+            else:
+                columns[field] = _NumberColumn(memoryview(data).cast(kind))
+        indices = func(columns)
+    else:
+        shared = await to_thread(SharedColumns.from_rows, rows, fields)
+        with shared:
+            indices = await to_process(_select, func, shared)
+    return [rows[index] for index in indices]
@@ -0,0 +1,279 @@
+"""
+Backpressure-aware async pipelines for streaming data between tools.
+
+A pipeline is a source followed by stages connected with bounded queues.
+Each stage runs its own workers, so a slow stage makes the queue in front
+of it fill up. That pauses the stages upstream of it instead of buffering
+without limit. Memory therefore stays bounded by the queue sizes plus
+whatever the source holds, and throughput is set by the slowest stage.
+sheet_rows() fetches the whole sheet in one call; salesforce_records()
+fetches one page at a time, as the pipeline needs it.
+
+Example: stream sheet rows, drop completed orders, tokenize the customer,
+and push updates to Salesforce in batches of 50 with 4 concurrent senders.
+run() returns the number of rows sent, counting each row of a batch:
+
+    sent = await (
+        Pipeline.source(sheet_rows('abc123'))
+        .filter(lambda row: row['Status'] != 'completed')
+        .map(tokenize, concurrency=8)
+        .batch(50)
+        .sink(update_records('Order__c', id_field='Order ID'), concurrency=4)
+        .run()
+    )
+
+map, filter and sink accept plain or async functions. With concurrency
+above 1, items may leave a stage in a different order than they entered.
+"""
+
+import asyncio
+import inspect
+from typing import (Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict,
+                    Iterable, List, Optional, Union)
+
+from servers import google_drive, salesforce
+
+# Default capacity of the queue in front of each stage
+DEFAULT_BUFFER = 100
+
+_DONE = object()
+
+
+class _Batch(list):  # type: ignore[type-arg]
+    """A list of items made by batch(), counted item by item at the sink."""
+
+
+async def _call(func: Callable[..., Any], item: Any) -> Any:
+    result = func(item)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def _iterate(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if hasattr(items, '__aiter__'):
+        async for item in items:  # type: ignore[union-attr]
+            yield item
+    else:
+        for item in items:  # type: ignore[union-attr]
+            yield item
+
+
+class _Stage:
+    """One step of a pipeline: a kind, a function and its worker count."""
+
+    def __init__(self, kind: str, func: Optional[Callable[..., Any]] = None,
+                 concurrency: int = 1, size: int = 0, buffer: int = DEFAULT_BUFFER):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.kind = kind
+        self.func = func
+        self.concurrency = concurrency
+        self.size = size
+        self.buffer = buffer
+        self.processed = 0
+        # Items consumed, with each item of a batch counted separately
+        self.items = 0
+
+
+class Pipeline:
+    """A source plus a chain of stages. Build with Pipeline.source()."""
+
+    def __init__(self, items: Union[Iterable[Any], AsyncIterable[Any]]):
+        self._items = items
+        self._stages: List[_Stage] = []
+        self._sink: Optional[_Stage] = None
+
+    @classmethod
+    def source(cls, items: Union[Iterable[Any], AsyncIterable[Any]]) -> 'Pipeline':
+        """Start a pipeline from an iterable or async iterable."""
+        return cls(items)
+
+    def map(self, func: Callable[[Any], Any], concurrency: int = 1,
+            buffer: int = DEFAULT_BUFFER) -> 'Pipeline':
+        """Transform each item with func, using `concurrency` workers."""
+        self._add(_Stage('map', func, concurrency, buffer=buffer))
+        return self
+
+    def filter(self, predicate: Callable[[Any], Any], concurrency: int = 1,
+               buffer: int = DEFAULT_BUFFER) -> 'Pipeline':
+        """Keep only the items for which predicate returns true."""
+        self._add(_Stage('filter', predicate, concurrency, buffer=buffer))
+        return self
+
+    def batch(self, size: int, buffer: int = DEFAULT_BUFFER) -> 'Pipeline':
+        """Group items into lists of `size` (the last one may be shorter)."""
+        if size < 1:
+            raise ValueError("batch size must be at least 1")
+        self._add(_Stage('batch', size=size, buffer=buffer))
+        return self
+
+    def sink(self, func: Callable[[Any], Any], concurrency: int = 1,
+             buffer: int = DEFAULT_BUFFER) -> 'Pipeline':
+        """Consume every item with func, using `concurrency` workers. Ends the pipeline."""
+        self._add(_Stage('sink', func, concurrency, buffer=buffer))
+        self._sink = self._stages[-1]
+        return self
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Items each stage has processed so far."""
+        return [{'stage': stage.kind, 'processed': stage.processed} for stage in self._stages]
+
+    async def run(self) -> int:
+        """
+        Run the pipeline to completion.
+
+        Returns:
+            Number of items consumed by the sink. The items of a batch
+            count individually, so this is still the number of rows after
+            batch(50).
+
+        Raises:
+            Whatever a stage raised. The other stages are cancelled.
+        """
+        if self._sink is None:
+            raise ValueError("Pipeline has no sink; call sink() or use collect()")
+        await self._execute()
+        return self._sink.items
+
+    async def collect(self) -> List[Any]:
+        """Run a pipeline without a sink and return its output as a list."""
+        if self._sink is not None:
+            raise ValueError("Pipeline already has a sink; use run()")
+        results: List[Any] = []
+        self.sink(results.append)
+        await self._execute()
+        return results
+
+    def _add(self, stage: _Stage) -> None:
+        if self._sink is not None:
+            raise ValueError("Cannot add stages after the sink")
+        self._stages.append(stage)
+
+    async def _execute(self) -> None:
+        queues = [asyncio.Queue(maxsize=stage.buffer) for stage in self._stages]
+        tasks = [asyncio.ensure_future(self._feed(queues[0]))]
+        for index, stage in enumerate(self._stages):
+            output = queues[index + 1] if index + 1 < len(queues) else None
+            tasks.append(asyncio.ensure_future(self._run_stage(stage, queues[index], output)))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _feed(self, queue: 'asyncio.Queue[Any]') -> None:
+        async for item in _iterate(self._items):
+            await queue.put(item)
+        await queue.put(_DONE)
+
+    async def _run_stage(self, stage: _Stage, input: 'asyncio.Queue[Any]',
+                         output: Optional['asyncio.Queue[Any]']) -> None:
+        if stage.kind == 'batch':
+            await self._run_batch(stage, input, output)
+        else:
+            await asyncio.gather(*[
+                self._run_worker(stage, input, output) for _ in range(stage.concurrency)
+            ])
+        if output is not None:
+            await output.put(_DONE)
+
+    async def _run_worker(self, stage: _Stage, input: 'asyncio.Queue[Any]',
+                          output: Optional['asyncio.Queue[Any]']) -> None:
+        while True:
+            item = await input.get()
+            if item is _DONE:
+                # Pass the end marker on to this stage's other workers
+                await input.put(_DONE)
+                return
+
+            result = await _call(stage.func, item)  # type: ignore[arg-type]
+            stage.processed += 1
+            stage.items += len(item) if isinstance(item, _Batch) else 1
+            if output is None:
+                continue
+            if stage.kind == 'map':
+                await output.put(result)
+            elif result:
+                await output.put(item)
+
+    async def _run_batch(self, stage: _Stage, input: 'asyncio.Queue[Any]',
+                         output: Optional['asyncio.Queue[Any]']) -> None:
+        batch = _Batch()
+        while True:
+            item = await input.get()
+            if item is _DONE:
+                break
+            batch.append(item)
+            stage.processed += 1
+            if len(batch) >= stage.size:
+                if output is not None:
+                    await output.put(batch)
+                batch = _Batch()
+        if batch and output is not None:
+            await output.put(batch)
+
+
+async def sheet_rows(sheet_id: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Source: the rows of a Google Sheet.
+
+    The sheet is fetched in one call, so all of its rows are in memory
+    while they are yielded.
+    """
+    result = await google_drive.get_sheet({'sheet_id': sheet_id})
+    for row in result['rows']:
+        yield row
+
+
+def salesforce_records(soql: str, page_size: int = 2000) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Source: the records of a Salesforce query, fetched a page at a time.
+
+    The next page is only requested once the pipeline has room for it.
+    """
+    from jobs import salesforce_pages
+
+    fetch_page = salesforce_pages(soql, page_size)
+
+    async def records() -> AsyncIterator[Dict[str, Any]]:
+        cursor = None
+        while True:
+            page, cursor = await fetch_page(cursor)
+            for record in page:
+                yield record
+            if cursor is None:
+                return
+
+    return records()
+
+
+def update_records(object_type: str, id_field: str,
+                   fields: Optional[List[str]] = None) -> Callable[[Any], Awaitable[None]]:
+    """
+    Sink: update a Salesforce record per row, or per row of a batch.
+
+    Args:
+        object_type: Salesforce object to update
+        id_field: Row field holding the record id
+        fields: Row fields to send (default: every field except id_field)
+    """
+    async def update(row: Dict[str, Any]) -> None:
+        data = {key: value for key, value in row.items()
+                if key != id_field and (fields is None or key in fields)}
+        await salesforce.update_record({
+            'object_type': object_type,
+            'record_id': str(row[id_field]),
+            'data': data,
+        })
+
+    async def sink(item: Any) -> None:
+        if isinstance(item, list):
+            await asyncio.gather(*[update(row) for row in item])
+        else:
+            await update(item)
+
+    return sink
@@ -6,10 +6,11 @@ of code execution with MCP.
 """
 
 import asyncio
-import subprocess
 import sys
 import os
 
+import runtime
+
 
 async def run_example(script_name: str, description: str):
     """Run a single example script."""
@@ -17,15 +18,15 @@ async def run_example(script_name: str, description: str):
     print(f"Running: {description}")
     print("=" * 70 + "\n")
 
-    # Run the script
-    result = subprocess.run(
-        [sys.executable, script_name],
+    # Run the script without blocking the event loop
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, script_name,
         cwd=os.path.dirname(os.path.abspath(__file__)),
-        capture_output=False
     )
+    returncode = await process.wait()
 
-    if result.returncode != 0:
-        print(f"\n❌ Example failed with return code {result.returncode}")
+    if returncode != 0:
+        print(f"\n❌ Example failed with return code {returncode}")
         return False
 
     print("\n✓ Example completed successfully")
@@ -49,6 +50,7 @@ async def main():
         ("examples/04_state_persistence.py", "State Persistence"),
         ("examples/05_privacy_preservation.py", "Privacy Preservation"),
         ("examples/06_reusable_skills.py", "Reusable Skills"),
+        ("examples/07_parallel_workflow.py", "Parallel Workflows"),
     ]
 
     results = []
@@ -84,4 +86,4 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    runtime.run(main())
@@ -0,0 +1,202 @@
+"""
+Entry point for running agent code, with event-loop health monitoring.
+
+runtime.run() is a drop-in replacement for asyncio.run() that:
+
+- uses uvloop when asked to (fast_loop=True or MCP_FAST_LOOP=1) and it
+  is installed
+- samples event-loop lag for the whole run
+- logs a warning with the stack of the code holding the loop whenever the
+  loop is blocked for longer than slow_callback_ms (default 100 ms,
+  or $MCP_SLOW_CALLBACK_MS)
+- reports the lag statistics when the run ends, through an on_stats
+  callback and last_stats(), and as a log summary (a warning if the loop
+  stalled)
+
+A blocked loop holds up every in-flight tool call, so these warnings point
+at the agent code that should await, batch or offload its work (see
+offload.py).
+
+Example:
+    if __name__ == '__main__':
+        runtime.run(main())
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Coroutine, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Loop stalls longer than this are logged, in milliseconds
+SLOW_CALLBACK_MS = float(os.environ.get('MCP_SLOW_CALLBACK_MS', 100))
+
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+
+def fast_loop_factory() -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+    """uvloop's event loop factory if uvloop is installed, else None."""
+    try:
+        import uvloop
+    except ImportError:
+        return None
+    return uvloop.new_event_loop
+
+
+class LoopMonitor:
+    """
+    Samples event-loop lag and reports stalls.
+
+    A task on the loop measures how late a short sleep wakes up (the lag).
+    A watchdog thread notices when that task stops running and logs the
+    stack the loop thread is executing at that moment.
+    """
+
+    def __init__(self, interval: float = 0.05, slow_callback_ms: float = SLOW_CALLBACK_MS):
+        """
+        Args:
+            interval: Seconds between lag samples
+            slow_callback_ms: Stalls longer than this are logged
+        """
+        self.interval = interval
+        self.threshold = slow_callback_ms / 1000
+        self.samples = 0
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._total_lag = 0.0
+        self._heartbeat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: 'Optional[asyncio.Task[None]]' = None
+        self._stopped = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start monitoring the running loop."""
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.ensure_future(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop monitoring."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag statistics so far, in milliseconds."""
+        return {
+            'samples': self.samples,
+            'stalls': self.stalls,
+            'max_lag_ms': round(self.max_lag * 1000, 3),
+            'mean_lag_ms': round(self._total_lag / self.samples * 1000, 3) if self.samples else 0.0,
+        }
+
+    async def _sample(self) -> None:
+        while True:
+            start = time.monotonic()
+            self._heartbeat = start
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - start - self.interval)
+            self.samples += 1
+            self._total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stopped.wait(min(self.interval, self.threshold / 2)):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            if blocked >= self.threshold and heartbeat != reported:
+                # Report each stall once, while it is still happening
+                reported = heartbeat
+                self.stalls += 1
+                logger.warning("Event loop blocked for over %.0f ms in:\n%s",
+                               blocked * 1000, self._loop_stack())
+
+    def _loop_stack(self) -> str:
+        frame = sys._current_frames().get(self._loop_thread)  # type: ignore[arg-type]
+        if frame is None:
+            return '  (stack unavailable)'
+        stack = traceback.extract_stack(frame)
+        # The event loop machinery is the same for every stall; show the agent code
+        agent = [entry for entry in stack
+                 if not entry.filename.startswith(_ASYNCIO_DIR) and entry.filename != __file__]
+        return ''.join(traceback.format_list(agent or stack)).rstrip()
+
+
+_last_stats: Optional[Dict[str, Any]] = None
+
+
+def last_stats() -> Optional[Dict[str, Any]]:
+    """Loop lag statistics of the last monitored run(), or None."""
+    return _last_stats
+
+
+async def _monitored(main: Coroutine[Any, Any, T], monitor: LoopMonitor,
+                     on_stats: Optional[Callable[[Dict[str, Any]], None]]) -> T:
+    global _last_stats
+    monitor.start()
+    try:
+        return await main
+    finally:
+        await monitor.stop()
+        _last_stats = monitor.stats()
+        # Quiet runs log at INFO; a run that stalled is worth a visible summary
+        level = logging.WARNING if monitor.stalls else logging.INFO
+        logger.log(level, "Event loop lag: %s", _last_stats)
+        if on_stats is not None:
+            on_stats(_last_stats)
+
+
+def run(main: Coroutine[Any, Any, T], *, fast_loop: Optional[bool] = None,
+        monitor: bool = True, slow_callback_ms: float = SLOW_CALLBACK_MS,
+        on_stats: Optional[Callable[[Dict[str, Any]], None]] = None,
+        debug: bool = False) -> T:
+    """
+    Run a coroutine to completion, like asyncio.run().
+
+    Args:
+        main: Coroutine to run
+        fast_loop: Use uvloop if installed (default: only if MCP_FAST_LOOP=1)
+        monitor: Sample loop lag and log stalls with the blocking stack
+        slow_callback_ms: Stalls longer than this are logged
+        on_stats: Called with the lag statistics when the run ends. They
+            are also available from last_stats() afterwards.
+        debug: Run the loop in asyncio debug mode
+
+    Returns:
+        The coroutine's result
+    """
+    if fast_loop is None:
+        fast_loop = os.environ.get('MCP_FAST_LOOP') == '1'
+    factory = fast_loop_factory() if fast_loop else None
+
+    if monitor:
+        main = _monitored(main, LoopMonitor(slow_callback_ms=slow_callback_ms), on_stats)
+
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(debug=debug, loop_factory=factory) as runner:
+            return runner.run(main)
+
+    if factory is not None:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return asyncio.run(main, debug=debug)
@@ -1,5 +1,32 @@
-"""Reusable Agent Skills"""
+"""
+Reusable Agent Skills
 
-from .save_sheet_as_csv import save_sheet_as_csv
+Skills are listed in manifest.json and loaded lazily through the registry,
+so importing this package does not import any skill until it is used.
+"""
 
-__all__ = ['save_sheet_as_csv']
+from typing import Any
+
+from .memoize import clear_memo, memoize_skill
+from .registry import SkillEntry, SkillRegistry, registry
+
+__all__ = [
+    'clear_memo',
+    'memoize_skill',
+    'registry',
+    'SkillEntry',
+    'SkillRegistry',
+    'save_sheet_as_csv',
+    'sync_sheet_to_salesforce',
+    'SyncResult',
+]
+
+
+def __getattr__(name: str) -> Any:
+    """Load skills (and names they export) on first access."""
+    try:
+        if name in registry:
+            return registry.get(name)
+        return registry.export(name)
+    except KeyError:
+        raise AttributeError(f"module 'skills' has no attribute '{name}'") from None
@@ -0,0 +1,138 @@
+"""
+Memoization for skills.
+
+A memoized skill remembers its result together with the version of every
+tool result it read. When it is called again with the same arguments, the
+versions are re-checked with cheap metadata calls; if nothing upstream has
+changed, the previous result is returned without re-fetching or
+re-writing anything.
+
+Example:
+    @memoize_skill
+    async def save_sheet_as_csv(sheet_id: str, output_dir: str = './workspace') -> str:
+        ...
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+F = TypeVar('F', bound=Callable[..., Awaitable[Any]])
+
+DEFAULT_CACHE_DIR = './workspace/.skill-memo'
+
+
+def _source_hash(func: Callable[..., Any]) -> str:
+    """Hash of the skill's source file, so editing a skill invalidates its results."""
+    try:
+        path = inspect.getsourcefile(func)
+        with open(path, 'rb') as f:  # type: ignore[arg-type]
+            return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+    except (OSError, TypeError):
+        return ''
+
+
+async def _still_current(entry: Dict[str, Any]) -> bool:
+    """True if every tool input the cached result was built from is unchanged."""
+    import asyncio
+
+    from client import get_tool_version
+
+    if entry.get('result_is_path') and not os.path.exists(entry['result']):
+        return False
+    versions = await asyncio.gather(*[
+        get_tool_version(read['tool'], read['parameters']) for read in entry['reads']
+    ])
+    return all(
+        version is not None and version == read['version']
+        for read, version in zip(entry['reads'], versions)
+    )
+
+
+def memoize_skill(func: Optional[F] = None, *, cache_dir: str = DEFAULT_CACHE_DIR) -> Any:
+    """
+    Decorate an async skill so repeated calls reuse its previous result.
+
+    Results are keyed on the skill's arguments and source, and stored as
+    JSON in cache_dir together with the versions of the tool results the
+    skill read. A cached result is reused only if every one of those tools
+    still reports the same version and, for results that are file paths,
+    the file still exists. Results that are not JSON-serializable, or that
+    depend on tools that do not report versions, are not cached.
+
+    Can be used bare (``@memoize_skill``) or with options
+    (``@memoize_skill(cache_dir=...)``).
+    """
+    def decorator(skill: F) -> F:
+        signature = inspect.signature(skill)
+        skill_id = f'{skill.__module__}.{skill.__qualname__}'
+        source_hash = _source_hash(skill)
+
+        @functools.wraps(skill)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            # Imported on first call so importing skills stays cheap
+            from client import record_tool_reads
+            from offload import to_thread
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key_data = json.dumps([skill_id, source_hash, bound.arguments],
+                                  sort_keys=True, default=repr)
+            key = hashlib.blake2b(key_data.encode('utf-8'), digest_size=16).hexdigest()
+            path = os.path.join(cache_dir, f'{skill.__name__}-{key}.json')
+
+            entry = _load(path)
+            if entry is not None and await _still_current(entry):
+                # Let an enclosing memoized skill see what this result depends on
+                with record_tool_reads() as reads:
+                    reads.extend(entry['reads'])
+                return entry['result']
+
+            with record_tool_reads() as reads:
+                result = await skill(*args, **kwargs)
+
+            if all(read['version'] is not None for read in reads):
+                await to_thread(_save, path, {
+                    'skill': skill_id,
+                    'reads': reads,
+                    'result': result,
+                    'result_is_path': isinstance(result, str) and os.path.exists(result),
+                })
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def _load(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save(path: str, entry: Dict[str, Any]) -> None:
+    from workspace_io import _atomic_write
+
+    try:
+        data = json.dumps(entry)
+    except (TypeError, ValueError):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _atomic_write(path, data)
+
+
+def clear_memo(cache_dir: str = DEFAULT_CACHE_DIR) -> None:
+    """Forget every memoized result in cache_dir."""
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        if name.endswith('.json'):
+            os.remove(os.path.join(cache_dir, name))
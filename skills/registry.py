@@ -0,0 +1,286 @@
+"""
+Skill registry: manifest-driven discovery and lazy loading of skills.
+
+Skills are listed in ``manifest.json`` with a name, a version, the file
+that implements them and a description. Nothing is imported until a skill
+is first requested, so an agent with hundreds of skills only pays for the
+ones it uses. Compiled code objects are cached on disk keyed by a hash of
+the skill's source, so unchanged skills load without being recompiled.
+
+Example:
+    from skills.registry import registry
+
+    registry.search('csv')                      # find skills by description
+    save = registry.get('save_sheet_as_csv')     # latest version
+    save_v1 = registry.get('save_sheet_as_csv', version='1.0.0')
+"""
+
+import hashlib
+import importlib.util
+import json
+import marshal
+import os
+import re
+import sys
+import types
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+SKILLS_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_PATH = os.path.join(SKILLS_DIR, 'manifest.json')
+CACHE_DIR = os.path.join(SKILLS_DIR, '__skillcache__')
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def _version_key(version: str) -> Tuple[Any, ...]:
+    """Sort key for versions like '1.10.0' (numeric parts compare as numbers)."""
+    return tuple(int(part) if part.isdigit() else part for part in version.split('.'))
+
+
+def _words(text: str) -> Set[str]:
+    return set(_WORD.findall(text.lower()))
+
+
+class SkillEntry:
+    """
+    One version of a skill as listed in the manifest.
+
+    module is relative to base_dir, the manifest's directory, and is
+    imported into package.
+    """
+
+    def __init__(self, name: str, version: str, module: str, function: str,
+                 description: str = '', exports: Optional[List[str]] = None,
+                 base_dir: str = SKILLS_DIR, package: str = 'skills'):
+        self.name = name
+        self.version = version
+        self.module = module
+        self.function = function
+        self.description = description
+        self.exports = list(exports or [])
+        self.base_dir = base_dir
+        self.package = package
+
+    @property
+    def path(self) -> str:
+        """Absolute path of the file implementing the skill."""
+        return os.path.join(self.base_dir, self.module)
+
+    @property
+    def module_name(self) -> str:
+        """Import name of the skill's module, e.g. skills.save_sheet_as_csv."""
+        return f'{self.package}.' + os.path.splitext(self.module)[0].replace('/', '.')
+
+    def to_dict(self) -> Dict[str, Any]:
+        entry = {
+            'name': self.name,
+            'version': self.version,
+            'module': self.module,
+            'function': self.function,
+            'description': self.description,
+        }
+        if self.exports:
+            entry['exports'] = self.exports
+        return entry
+
+    def __repr__(self) -> str:
+        return f'SkillEntry({self.name!r}, {self.version!r})'
+
+
+class SkillRegistry:
+    """Index of the skills listed in a manifest."""
+
+    def __init__(self, manifest_path: str = MANIFEST_PATH, cache_dir: Optional[str] = CACHE_DIR):
+        """
+        Args:
+            manifest_path: JSON manifest listing the skills
+            cache_dir: Directory for compiled code (None disables the cache)
+        """
+        self.manifest_path = manifest_path
+        self.cache_dir = cache_dir
+        self.base_dir = os.path.dirname(os.path.abspath(manifest_path))
+        # Skills of another manifest get their own package, so a module named
+        # like one of ours (or like anything else imported) is never reused
+        if self.base_dir == SKILLS_DIR:
+            self.package = 'skills'
+        else:
+            digest = hashlib.blake2b(self.base_dir.encode('utf-8'), digest_size=8).hexdigest()
+            self.package = f'_skills_{digest}'
+        self._versions: Dict[str, List[SkillEntry]] = {}
+        self._exports: Dict[str, str] = {}
+        self._word_index: Optional[Dict[str, Set[str]]] = None
+        self._load_manifest()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._versions
+
+    def names(self) -> List[str]:
+        """Names of all registered skills."""
+        return sorted(self._versions)
+
+    def versions(self, name: str) -> List[str]:
+        """Registered versions of a skill, oldest first."""
+        return [entry.version for entry in self._entries(name)]
+
+    def entry(self, name: str, version: Optional[str] = None) -> SkillEntry:
+        """
+        Look up a skill's manifest entry.
+
+        Args:
+            name: Skill name
+            version: Exact version (default: the latest)
+        """
+        entries = self._entries(name)
+        if version is None:
+            return entries[-1]
+        for entry in entries:
+            if entry.version == version:
+                return entry
+        raise KeyError(f"Skill '{name}' has no version {version}")
+
+    def get(self, name: str, version: Optional[str] = None) -> Any:
+        """
+        Load a skill and return its function.
+
+        The skill's module is only imported on first use.
+        """
+        entry = self.entry(name, version)
+        return getattr(self._import(entry), entry.function)
+
+    def export(self, attribute: str) -> Any:
+        """Return a name a skill module exports besides its function, e.g. a TypedDict."""
+        name = self._exports.get(attribute)
+        if name is None:
+            raise KeyError(attribute)
+        return getattr(self._import(self.entry(name)), attribute)
+
+    def search(self, text: str, limit: int = 10) -> List[SkillEntry]:
+        """
+        Find skills whose name or description mentions the words in text.
+
+        Returns:
+            Latest versions of matching skills, best match first
+        """
+        if self._word_index is None:
+            self._word_index = {}
+            for name, entries in self._versions.items():
+                latest = entries[-1]
+                for word in _words(f'{name.replace("_", " ")} {latest.description}'):
+                    self._word_index.setdefault(word, set()).add(name)
+
+        scores: Dict[str, int] = {}
+        for word in _words(text):
+            for name in self._word_index.get(word, ()):
+                scores[name] = scores.get(name, 0) + 1
+        ranked = sorted(scores, key=lambda name: (-scores[name], name))
+        return [self._versions[name][-1] for name in ranked[:limit]]
+
+    def register(self, name: str, version: str, module: str, function: str,
+                 description: str = '', exports: Optional[List[str]] = None) -> SkillEntry:
+        """
+        Add a skill version and save the manifest.
+
+        Args:
+            name: Skill name
+            version: Version string, e.g. '1.1.0'
+            module: File implementing the skill, relative to the manifest's directory
+            function: Name of the skill function in that file
+            description: What the skill does, used by search()
+            exports: Other names the module provides to importers
+
+        Returns:
+            The new entry
+        """
+        if any(entry.version == version for entry in self._versions.get(name, [])):
+            raise ValueError(f"Skill '{name}' already has version {version}")
+        entry = SkillEntry(name, version, module, function, description, exports,
+                           self.base_dir, self.package)
+        self._add(entry)
+        self._save_manifest()
+        return entry
+
+    def _entries(self, name: str) -> List[SkillEntry]:
+        try:
+            return self._versions[name]
+        except KeyError:
+            raise KeyError(f"Unknown skill: {name}") from None
+
+    def _add(self, entry: SkillEntry) -> None:
+        entries = self._versions.setdefault(entry.name, [])
+        entries.append(entry)
+        entries.sort(key=lambda e: _version_key(e.version))
+        for attribute in entry.exports:
+            self._exports[attribute] = entry.name
+        self._word_index = None
+
+    def _load_manifest(self) -> None:
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, 'r') as f:
+            manifest = json.load(f)
+        for item in manifest.get('skills', []):
+            self._add(SkillEntry(**item, base_dir=self.base_dir, package=self.package))
+
+    def _save_manifest(self) -> None:
+        # Imported here so loading the registry stays cheap
+        from workspace_io import _atomic_write
+
+        skills = [entry.to_dict() for name in sorted(self._versions)
+                  for entry in self._versions[name]]
+        _atomic_write(self.manifest_path, json.dumps({'skills': skills}, indent=2) + '\n')
+
+    def _import(self, entry: SkillEntry) -> types.ModuleType:
+        module = sys.modules.get(entry.module_name)
+        if module is not None:
+            return module
+
+        if entry.package not in sys.modules:
+            # A package over the manifest's directory, for relative imports
+            package = types.ModuleType(entry.package)
+            package.__path__ = [entry.base_dir]  # type: ignore[attr-defined]
+            sys.modules[entry.package] = package
+
+        module = types.ModuleType(entry.module_name)
+        module.__file__ = entry.path
+        module.__package__ = entry.package
+        sys.modules[entry.module_name] = module
+        try:
+            exec(self._code(entry), module.__dict__)
+        except BaseException:
+            del sys.modules[entry.module_name]
+            raise
+        return module
+
+    def _code(self, entry: SkillEntry) -> types.CodeType:
+        """Compile a skill, reusing the cached code object if the source is unchanged."""
+        with open(entry.path, 'rb') as f:
+            source = f.read()
+        if self.cache_dir is None:
+            return compile(source, entry.path, 'exec')
+
+        # The path is compiled into the code object, so it is part of the key
+        key = importlib.util.MAGIC_NUMBER + entry.path.encode('utf-8') + b'\0' + source
+        digest = hashlib.sha256(key).hexdigest()[:16]
+        stem = os.path.splitext(entry.module)[0].replace('/', '.')
+        cache_path = os.path.join(self.cache_dir, f'{stem}-{digest}.code')
+        try:
+            with open(cache_path, 'rb') as f:
+                return marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        code = compile(source, entry.path, 'exec')
+        from workspace_io import _atomic_write
+
+        # Like __pycache__, the cache is an optimization: a read-only install
+        # still loads its skills, just without caching them
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _atomic_write(cache_path, marshal.dumps(code))
+        except OSError:
+            pass
+        return code
+
+
+# Registry of the skills shipped in this package
+registry = SkillRegistry()
@@ -1,21 +1,21 @@
 """Reusable skill: Save Google Sheet as CSV"""
 
-import csv
 import os
-import sys
-
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from servers import google_drive
+from skills.memoize import memoize_skill
+from workspace_io import write_csv
 
 
+@memoize_skill
 async def save_sheet_as_csv(sheet_id: str, output_dir: str = './workspace') -> str:
     """
     Download a Google Sheet and save it as a CSV file.
 
     This is a reusable skill that agents can call to persist
-    spreadsheet data for later processing.
+    spreadsheet data for later processing. If the sheet has not changed
+    since the last call, the existing file is returned without
+    re-downloading it.
 
     Args:
         sheet_id: The ID of the Google Sheet to download
@@ -34,15 +34,8 @@ async def save_sheet_as_csv(sheet_id: str, output_dir: str = './workspace') -> s
     # Generate output filename
     file_path = os.path.join(output_dir, f'sheet-{sheet_id}.csv')
 
-    # Write to CSV
+    # Write to CSV without blocking other tool calls
     if rows:
-        with open(file_path, 'w', newline='') as f:
-            # Get headers from first row
-            headers = list(rows[0].keys())
-            writer = csv.DictWriter(f, fieldnames=headers)
-
-            writer.writeheader()
-            for row in rows:
-                writer.writerow(row)
+        await write_csv(file_path, rows)
 
     return file_path
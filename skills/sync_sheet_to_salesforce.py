@@ -0,0 +1,129 @@
+"""Reusable skill: Incrementally sync a Google Sheet to Salesforce"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, Tuple, TypedDict
+
+from servers import google_drive, salesforce
+
+
+class SyncResult(TypedDict):
+    """Summary of a sync run"""
+    inserted: int
+    updated: int
+    unchanged: int
+    sent: int
+    batches: int
+
+
+def _row_hash(data: Dict[str, Any]) -> str:
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _open_state(state_path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(state_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    db = sqlite3.connect(state_path)
+    db.execute(
+        'CREATE TABLE IF NOT EXISTS sync_state ('
+        ' scope TEXT NOT NULL,'
+        ' record_id TEXT NOT NULL,'
+        ' row_hash TEXT NOT NULL,'
+        ' PRIMARY KEY (scope, record_id))'
+    )
+    return db
+
+
+async def sync_sheet_to_salesforce(
+    sheet_id: str,
+    object_type: str,
+    id_field: str,
+    field_map: Dict[str, str],
+    state_path: str = './workspace/sync-state.db',
+    batch_size: int = 50,
+) -> SyncResult:
+    """
+    Push new and changed sheet rows to Salesforce.
+
+    Each row is hashed over the fields it maps to. The hashes of rows that
+    were sent successfully are kept in a local SQLite index keyed by record
+    id, so later runs only send rows that are new or whose mapped fields
+    changed. API calls therefore scale with the number of changes rather
+    than with the size of the sheet.
+
+    Args:
+        sheet_id: The ID of the Google Sheet to read
+        object_type: Salesforce object to update (e.g. 'Lead')
+        id_field: Sheet column holding the Salesforce record id
+        field_map: Salesforce field name -> sheet column name
+        state_path: SQLite file holding the hash index
+            (default: ./workspace/sync-state.db)
+        batch_size: Number of updates sent concurrently per batch
+
+    Returns:
+        Counts of inserted, updated and unchanged rows, and of updates sent
+    """
+    result = await google_drive.get_sheet({'sheet_id': sheet_id})
+    rows = result['rows']
+
+    scope = f'{sheet_id}:{object_type}'
+    db = _open_state(state_path)
+    try:
+        known = dict(db.execute(
+            'SELECT record_id, row_hash FROM sync_state WHERE scope = ?', (scope,)
+        ))
+
+        summary: SyncResult = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'sent': 0, 'batches': 0}
+        pending: List[Tuple[str, Dict[str, Any], str]] = []
+        for row in rows:
+            record_id = row.get(id_field)
+            if not record_id:
+                continue
+            record_id = str(record_id)
+            data = {field: row.get(column) for field, column in field_map.items()}
+            row_hash = _row_hash(data)
+
+            previous = known.get(record_id)
+            if previous == row_hash:
+                summary['unchanged'] += 1
+                continue
+            summary['inserted' if previous is None else 'updated'] += 1
+            pending.append((record_id, data, row_hash))
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            outcomes = await asyncio.gather(*[
+                salesforce.update_record({
+                    'object_type': object_type,
+                    'record_id': record_id,
+                    'data': data,
+                })
+                for record_id, data, _ in batch
+            ], return_exceptions=True)
+
+            # Remember only the rows Salesforce accepted, so failures are retried next run
+            sent = [
+                (scope, record_id, row_hash)
+                for (record_id, _, row_hash), outcome in zip(batch, outcomes)
+                if not isinstance(outcome, BaseException) and outcome.get('success')
+            ]
+            with db:
+                db.executemany(
+                    'INSERT OR REPLACE INTO sync_state (scope, record_id, row_hash) VALUES (?, ?, ?)',
+                    sent,
+                )
+            summary['sent'] += len(sent)
+            summary['batches'] += 1
+
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+    finally:
+        db.close()
+
+    return summary
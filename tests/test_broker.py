@@ -0,0 +1,196 @@
+"""Tests for the broker: its response cache, lost replies and socket checks"""
+
+import asyncio
+import os
+import socket
+import stat
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import broker
+import client
+from broker import Broker
+
+SHEET = {'sheet_id': 'abc123'}
+
+
+@pytest.fixture(autouse=True)
+def direct_calls(monkeypatch):
+    """Serve calls from the mock servers, never from a running broker."""
+    monkeypatch.setenv('MCP_BROKER', '0')
+    monkeypatch.setitem(client.MOCK_DATA['google_drive__get_sheet'], 'abc123',
+                        list(client.MOCK_DATA['google_drive__get_sheet']['abc123']))
+
+
+def _change_sheet():
+    client.MOCK_DATA['google_drive__get_sheet']['abc123'].append(
+        {'Order ID': '1006', 'Status': 'pending', 'Amount': 99.0, 'Customer': 'NewCo'})
+
+
+def test_reads_are_cached():
+    async def main():
+        instance = Broker(cache_ttl=60)
+        first = await instance._call('google_drive__get_sheet', SHEET)
+        _change_sheet()
+        second = await instance._call('google_drive__get_sheet', SHEET)
+        return instance, first, second
+
+    instance, first, second = asyncio.run(main())
+    assert second == first
+    assert instance.stats['hits'] == 1
+
+
+def test_version_change_drops_cached_result():
+    async def main():
+        instance = Broker(cache_ttl=60)
+        (rows, old_version) = await instance._call('google_drive__get_sheet', SHEET)
+        _change_sheet()
+        new_version = await instance._version('google_drive__get_sheet', SHEET)
+        return rows, old_version, new_version, await instance._call('google_drive__get_sheet', SHEET)
+
+    rows, old_version, new_version, (fresh_rows, fresh_version) = asyncio.run(main())
+    assert new_version != old_version
+    assert fresh_version == new_version
+    assert len(fresh_rows['rows']) == len(rows['rows']) + 1
+
+
+def test_unchanged_version_keeps_cached_result():
+    async def main():
+        instance = Broker(cache_ttl=60)
+        _, version = await instance._call('google_drive__get_sheet', SHEET)
+        assert await instance._version('google_drive__get_sheet', SHEET) == version
+        await instance._call('google_drive__get_sheet', SHEET)
+        return instance
+
+    assert asyncio.run(main()).stats['hits'] == 1
+
+
+def test_write_invalidates_cached_reads():
+    async def main():
+        instance = Broker(cache_ttl=60)
+        await instance._call('salesforce__query', {'query': 'SELECT Id FROM Lead'})
+        await instance._call('google_drive__get_sheet', SHEET)
+        await instance._call('salesforce__update_record',
+                           {'object_type': 'Lead', 'record_id': 'L001', 'data': {}})
+        return instance
+
+    instance = asyncio.run(main())
+    assert [key.split('__')[0] for key in instance._cache] == ['google_drive']
+
+
+def test_read_overlapping_a_write_is_not_cached():
+    async def main():
+        instance = Broker(cache_ttl=60)
+        before = asyncio.ensure_future(instance._call('google_drive__get_sheet', SHEET))
+        await asyncio.sleep(0)
+        instance._invalidate('google_drive')
+        after = asyncio.ensure_future(instance._call('google_drive__get_sheet', SHEET))
+        await asyncio.gather(before, after)
+        return instance
+
+    instance = asyncio.run(main())
+    # The read started after the write did not join the one started before it
+    assert instance.stats['coalesced'] == 0
+    assert instance.stats['calls'] == 2
+    assert len(instance._cache) == 1
+
+
+def test_failed_write_still_invalidates(monkeypatch):
+    async def fail(*args, **kwargs):
+        raise RuntimeError('server error')
+
+    async def main():
+        instance = Broker(cache_ttl=60)
+        await instance._call('google_drive__get_sheet', SHEET)
+        monkeypatch.setattr(client, 'call_server', fail)
+        with pytest.raises(RuntimeError):
+            await instance._call('google_drive__create_file', {})
+        return instance
+
+    assert asyncio.run(main())._cache == {}
+
+
+@pytest.fixture
+def through_broker(monkeypatch):
+    """Route call_mcp_tool through a broker whose request() raises `error`, counting direct calls."""
+    direct = []
+
+    async def call_server(tool_name, parameters, want_version=False):
+        direct.append(tool_name)
+        return {'success': True}, None
+
+    def install(error):
+        async def request(message):
+            raise error
+        monkeypatch.setattr(broker, 'broker_available', lambda: True)
+        monkeypatch.setattr(broker, 'request', request)
+        monkeypatch.setattr(client, 'call_server', call_server)
+        return direct
+
+    return install
+
+
+def test_lost_reply_is_not_repeated_for_writes(through_broker):
+    direct = through_broker(broker.BrokerReplyLost('connection reset'))
+    with pytest.raises(broker.BrokerReplyLost):
+        asyncio.run(client.call_mcp_tool('salesforce__update_record', {'record_id': 'L001'}))
+    assert direct == []
+
+
+def test_lost_reply_is_retried_for_reads(through_broker):
+    direct = through_broker(broker.BrokerReplyLost('connection reset'))
+    asyncio.run(client.call_mcp_tool('google_drive__get_sheet', SHEET))
+    assert direct == ['google_drive__get_sheet']
+
+
+def test_unsent_write_falls_back(through_broker):
+    direct = through_broker(broker.BrokerUnavailable('no socket'))
+    asyncio.run(client.call_mcp_tool('salesforce__update_record', {'record_id': 'L001'}))
+    assert direct == ['salesforce__update_record']
+
+
+def test_request_reports_lost_reply(tmp_path, monkeypatch):
+    path = str(tmp_path / 'broker.sock')
+    monkeypatch.setenv('MCP_BROKER_SOCKET', path)
+    received = []
+
+    async def hang_up(reader, writer):
+        received.append(await broker.read_message(reader))
+        writer.close()
+
+    async def main():
+        server = await asyncio.start_unix_server(hang_up, path=path)
+        async with server:
+            with pytest.raises(broker.BrokerReplyLost):
+                await broker.request({'op': 'call', 'tool': 'salesforce__update_record',
+                                      'parameters': {}})
+
+    asyncio.run(main())
+    assert len(received) == 1
+
+
+def test_socket_ownership(tmp_path, monkeypatch):
+    path = str(tmp_path / 'broker.sock')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(path)
+        assert broker._owned_socket(path)
+        monkeypatch.setattr(os, 'getuid', lambda: os.stat(path).st_uid + 1)
+        assert not broker._owned_socket(path)
+
+    plain = tmp_path / 'plain'
+    plain.write_bytes(b'')
+    assert not broker._owned_socket(str(plain))
+    assert not broker._owned_socket(str(tmp_path / 'missing'))
+
+
+def test_private_dir(tmp_path):
+    directory = str(tmp_path / 'broker')
+    broker._private_dir(directory)
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+    os.chmod(directory, 0o755)
+    with pytest.raises(PermissionError):
+        broker._private_dir(directory)
@@ -0,0 +1,73 @@
+"""Round-trip tests for the wire codecs"""
+
+import math
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from codec import CODECS, ColumnarDecoder, get_codec, iter_rows
+
+ROWS = [
+    {'id': 1, 'amount': 10.5, 'name': 'Acme Corp', 'tags': ['a', 'b']},
+    {'id': 2, 'amount': -0.25, 'name': 'Zoë Café 東京', 'tags': []},
+    {'id': 3, 'amount': 1e300, 'name': '', 'tags': None},
+]
+
+PAYLOADS = {
+    'rows': {'rows': ROWS},
+    'ints': {'rows': [{'n': n} for n in (0, -1, 2**63 - 1, -2**63)]},
+    'floats': {'rows': [{'x': x} for x in (0.1, -2.5, 1e-300, 123456.789)]},
+    'sparse': {'rows': [{'a': 1}, {'b': 'x'}, {'a': 3, 'c': {'nested': True}}, {}]},
+    'non_ascii': {'content': 'Grüße — naïve ☃ 😀', 'rows': [{'t': 'ß' * 1000}]},
+    'big_ints': {'rows': [{'n': 2**64}, {'n': -(2**70) - 1}, {'n': 2**70 + 1}]},
+    'big_int_scalar': {'total': 2**100, 'rows': [{'n': 1}]},
+    'empty_rows': {'rows': [{}, {}]},
+    'no_rows': {'content': 'plain document', 'size': 2**65},
+    'mixed_column': {'rows': [{'v': 1}, {'v': 'one'}, {'v': 1.5}, {'v': 2**80}]},
+}
+
+
+def _assert_same(actual, expected):
+    """Compare values exactly, including int vs float and NaN."""
+    assert type(actual) is type(expected), (actual, expected)
+    if isinstance(expected, dict):
+        assert list(actual) == list(expected)
+        for key in expected:
+            _assert_same(actual[key], expected[key])
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected)
+        for a, e in zip(actual, expected):
+            _assert_same(a, e)
+    elif isinstance(expected, float) and math.isnan(expected):
+        assert math.isnan(actual)
+    else:
+        assert actual == expected
+
+
+@pytest.mark.parametrize('codec_name', sorted(CODECS))
+@pytest.mark.parametrize('payload_name', sorted(PAYLOADS))
+def test_round_trip(codec_name, payload_name):
+    codec = get_codec(codec_name)
+    payload = PAYLOADS[payload_name]
+    _assert_same(codec.decode(codec.encode(payload)), payload)
+
+
+@pytest.mark.parametrize('payload_name', sorted(PAYLOADS))
+def test_columnar_incremental_decode(payload_name):
+    codec = get_codec('mcp-columnar')
+    payload = PAYLOADS[payload_name]
+    data = codec.encode(payload)
+
+    decoder = ColumnarDecoder(collect=True)
+    for start in range(0, len(data), 7):
+        decoder.feed(data[start:start + 7])
+    _assert_same(decoder.result(), payload)
+
+
+def test_columnar_iter_rows():
+    codec = get_codec('mcp-columnar')
+    rows = [{'i': i, 'name': f'row {i}', 'big': 2**64 + i} for i in range(5000)]
+    _assert_same(list(iter_rows(codec.iter_encode({'rows': rows}))), rows)
@@ -0,0 +1,53 @@
+"""Round-trip tests for framed payload compression"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from codec import CODECS, get_codec
+from compression import COMPRESSED, COMPRESSIONS, RAW, encode_frame, iter_frame
+
+DATA = {
+    'empty': b'',
+    'small': b'{"ok":true}',
+    'repetitive': b'row,pending,Acme Corp\n' * 20000,
+    'random': os.urandom(200_000),
+    'non_ascii': ('Grüße ☃ 😀 東京\n' * 10000).encode('utf-8'),
+}
+
+
+@pytest.mark.parametrize('compression_name', sorted(COMPRESSIONS))
+@pytest.mark.parametrize('data_name', sorted(DATA))
+@pytest.mark.parametrize('threshold', [0, 64 * 1024])
+def test_frame_round_trip(compression_name, data_name, threshold):
+    compression = COMPRESSIONS[compression_name]
+    data = DATA[data_name]
+    frame = encode_frame(data, compression, threshold=threshold)
+    assert frame[0] in (RAW, COMPRESSED)
+    pieces = list(iter_frame(frame, compression, chunk_size=4096))
+    assert all(len(piece) <= 4096 for piece in pieces)
+    assert b''.join(pieces) == data
+
+
+@pytest.mark.parametrize('compression_name', sorted(set(COMPRESSIONS) - {'identity'}))
+def test_small_payloads_stay_raw(compression_name):
+    frame = encode_frame(DATA['small'], COMPRESSIONS[compression_name])
+    assert frame[0] == RAW
+
+
+@pytest.mark.parametrize('compression_name', sorted(COMPRESSIONS))
+@pytest.mark.parametrize('codec_name', sorted(CODECS))
+def test_codec_through_frame(compression_name, codec_name):
+    codec = get_codec(codec_name)
+    payload = {'rows': [{'id': i, 'amount': i / 3, 'name': f'Zoë {i}', 'big': 2**64 + i}
+                        for i in range(5000)]}
+    frame = encode_frame(codec.encode(payload), COMPRESSIONS[compression_name], threshold=0)
+    assert codec.decode(b''.join(iter_frame(frame, COMPRESSIONS[compression_name]))) == payload
+
+
+def test_unknown_flag():
+    with pytest.raises(ValueError):
+        list(iter_frame(b'\x07data', COMPRESSIONS['identity']))
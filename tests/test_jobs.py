@@ -0,0 +1,90 @@
+"""Tests for keyset paging and resumable exports"""
+
+import asyncio
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import client
+import jobs
+from jobs import ExportJob, salesforce_pages
+
+LEADS = [{'Id': f'L{n:03d}', 'Email': f'lead{n}@example.com', 'Name': f'Lead {n}'}
+         for n in range(1, 8)]
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Serve salesforce.query from the mock data and record every query sent."""
+    sent = []
+
+    async def query(params):
+        sent.append(params['query'])
+        return client._call_mock_tool('salesforce__query', params)
+
+    monkeypatch.setitem(client.MOCK_DATA['salesforce__query'], 'leads', LEADS)
+    monkeypatch.setattr(jobs.salesforce, 'query', query)
+    return sent
+
+
+async def _all_pages(fetch_page):
+    pages, cursor = [], None
+    while True:
+        page, cursor = await fetch_page(cursor)
+        pages.append([record['Id'] for record in page])
+        if cursor is None:
+            return pages
+
+
+def test_pages_by_id(queries):
+    pages = asyncio.run(_all_pages(salesforce_pages('SELECT Id, Name FROM Lead', page_size=3)))
+    assert pages == [['L001', 'L002', 'L003'], ['L004', 'L005', 'L006'], ['L007']]
+    assert queries[0] == 'SELECT Id, Name FROM Lead ORDER BY Id LIMIT 3'
+    assert queries[1] == "SELECT Id, Name FROM Lead WHERE Id > 'L003' ORDER BY Id LIMIT 3"
+    assert not any('OFFSET' in query for query in queries)
+
+
+def test_existing_where_clause_is_kept(queries):
+    fetch_page = salesforce_pages("SELECT Id FROM Lead where Status = 'Open' OR Rating > 3",
+                                  page_size=2)
+    asyncio.run(fetch_page('L002'))
+    assert queries == ["SELECT Id FROM Lead WHERE (Status = 'Open' OR Rating > 3) "
+                       "AND Id > 'L002' ORDER BY Id LIMIT 2"]
+
+
+def test_cursor_is_quoted(queries):
+    asyncio.run(salesforce_pages('SELECT Id FROM Lead', page_size=2)("x' OR Id != '"))
+    assert "Id > 'x\\' OR Id != \\''" in queries[0]
+
+
+def test_full_last_page_ends_with_an_empty_page(queries):
+    pages = asyncio.run(_all_pages(salesforce_pages('SELECT Id FROM Lead', page_size=7)))
+    assert pages == [[f'L{n:03d}' for n in range(1, 8)], []]
+
+
+def test_interrupted_export_resumes_without_duplicates(queries, tmp_path):
+    output = str(tmp_path / 'leads.csv')
+    fetch_page = salesforce_pages('SELECT Id, Email, Name FROM Lead', page_size=3)
+    fetched = []
+
+    async def failing_fetch(cursor):
+        if len(fetched) == 2:
+            raise ConnectionError('network down')
+        fetched.append(cursor)
+        return await fetch_page(cursor)
+
+    first = ExportJob('leads', failing_fetch, output, ['Id', 'Email', 'Name'])
+    with pytest.raises(ConnectionError):
+        asyncio.run(first.run())
+    assert first.load_manifest()['rows'] == 6
+
+    queries.clear()
+    manifest = asyncio.run(ExportJob('leads', fetch_page, output, ['Id', 'Email', 'Name']).run())
+    assert manifest['status'] == 'complete' and manifest['rows'] == 7
+    assert queries == ["SELECT Id, Email, Name FROM Lead WHERE Id > 'L006' ORDER BY Id LIMIT 3"]
+    with open(output, newline='') as f:
+        assert [row['Id'] for row in csv.DictReader(f)] == [lead['Id'] for lead in LEADS]
@@ -0,0 +1,64 @@
+"""Tests for select_rows on both sides of the inline limit"""
+
+import asyncio
+import math
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import offload
+from offload import INLINE_LIMIT, select_rows
+
+
+def _rows(count):
+    return [{'Quantity': i % 10, 'Amount': None if i % 7 == 0 else i / 2,
+             'Status': 'pending' if i % 3 else 'done', 'Name': f'Zoë {i}'}
+            for i in range(count)]
+
+
+def sequence_methods(columns):
+    """A filter that uses list-like methods on every column kind."""
+    quantity, status, amount = columns['Quantity'], columns['Status'], columns['Amount']
+    assert quantity.index(7) == 7
+    assert quantity.count(0) == (len(quantity) + 9) // 10
+    assert status.index('done') == 0 and 'pending' in status
+    assert math.isnan(amount[0]) and amount[1] == 0.5
+    assert list(quantity[2:4]) == [2, 3] and status[-1] == status[len(status) - 1]
+    assert isinstance(quantity[0], int) and isinstance(amount[1], float)
+    return [i for i, value in enumerate(quantity) if value == 7]
+
+
+def names(columns):
+    return [i for i, name in enumerate(columns['Name']) if name.endswith('1')]
+
+
+@pytest.fixture(scope='module', autouse=True)
+def pools():
+    yield
+    offload.shutdown()
+
+
+@pytest.mark.parametrize('count', [100, INLINE_LIMIT + 10_000])
+def test_columns_behave_the_same_inline_and_in_workers(count):
+    rows = _rows(count)
+    selected = asyncio.run(select_rows(rows, sequence_methods, ['Quantity', 'Status', 'Amount']))
+    assert selected == [row for row in rows if row['Quantity'] == 7]
+
+
+@pytest.mark.parametrize('count', [100, INLINE_LIMIT + 10_000])
+def test_non_ascii_strings(count):
+    rows = _rows(count)
+    selected = asyncio.run(select_rows(rows, names, ['Name']))
+    assert selected == [row for row in rows if row['Name'].endswith('1')]
+
+
+def test_columns_are_read_only():
+    def assign(columns):
+        columns['Quantity'][0] = 1
+        return []
+
+    with pytest.raises(TypeError):
+        asyncio.run(select_rows(_rows(10), assign, ['Quantity']))
@@ -0,0 +1,28 @@
+"""Tests for pipeline item counting"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pipeline import Pipeline
+
+
+def test_run_counts_rows_inside_batches():
+    received = []
+    pipeline = Pipeline.source(range(120)).batch(50).sink(received.append, concurrency=2)
+    assert asyncio.run(pipeline.run()) == 120
+    assert sorted(len(batch) for batch in received) == [20, 50, 50]
+    assert pipeline.stats() == [{'stage': 'batch', 'processed': 120},
+                                {'stage': 'sink', 'processed': 3}]
+
+
+def test_run_counts_items_without_batches():
+    pipeline = Pipeline.source(range(10)).filter(lambda n: n % 2).sink(lambda n: None)
+    assert asyncio.run(pipeline.run()) == 5
+
+
+def test_mapped_batches_count_as_items():
+    pipeline = Pipeline.source(range(120)).batch(50).map(sum).sink(lambda total: None)
+    assert asyncio.run(pipeline.run()) == 3
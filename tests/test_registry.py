@@ -0,0 +1,71 @@
+"""Tests for the skill registry"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from skills.registry import SkillRegistry
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    """A manifest outside skills/ with a skill named like one of the package's."""
+    (tmp_path / 'helper.py').write_text("VALUE = 'from the other manifest'\n")
+    (tmp_path / 'save_sheet_as_csv.py').write_text(
+        'from .helper import VALUE\n\n'
+        'def save_sheet_as_csv():\n'
+        '    return VALUE\n'
+    )
+    path = tmp_path / 'manifest.json'
+    path.write_text(json.dumps({'skills': [{
+        'name': 'save_sheet_as_csv', 'version': '2.0.0', 'module': 'save_sheet_as_csv.py',
+        'function': 'save_sheet_as_csv', 'description': 'A skill from another manifest',
+    }]}))
+    return str(path)
+
+
+def test_modules_resolve_against_their_manifest(manifest, tmp_path):
+    import skills
+
+    registry = SkillRegistry(manifest, cache_dir=str(tmp_path / 'cache'))
+    entry = registry.entry('save_sheet_as_csv')
+    assert entry.path == str(tmp_path / 'save_sheet_as_csv.py')
+    assert entry.module_name != 'skills.save_sheet_as_csv'
+    assert registry.get('save_sheet_as_csv')() == 'from the other manifest'
+    # The package's own skill is unaffected
+    assert skills.registry.get('save_sheet_as_csv').__module__ == 'skills.save_sheet_as_csv'
+
+
+def test_compiled_code_is_cached(manifest, tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    first = SkillRegistry(manifest, cache_dir=str(cache_dir))
+    first._code(first.entry('save_sheet_as_csv'))
+    assert len(os.listdir(cache_dir)) == 1
+
+    # A second registry loads the cached code instead of compiling the source
+    monkeypatch.setattr('builtins.compile', None)
+    second = SkillRegistry(manifest, cache_dir=str(cache_dir))
+    code = second._code(second.entry('save_sheet_as_csv'))
+    assert code.co_filename == str(tmp_path / 'save_sheet_as_csv.py')
+
+
+def test_unwritable_cache_does_not_stop_loading(manifest, tmp_path):
+    blocker = tmp_path / 'not-a-directory'
+    blocker.write_text('')
+    registry = SkillRegistry(manifest, cache_dir=str(blocker / 'cache'))
+    assert registry.get('save_sheet_as_csv')() == 'from the other manifest'
+
+
+def test_register_saves_the_manifest(manifest, tmp_path):
+    (tmp_path / 'newer.py').write_text('def save_sheet_as_csv():\n    return 3\n')
+    registry = SkillRegistry(manifest, cache_dir=None)
+    registry.register('save_sheet_as_csv', '10.0.0', 'newer.py', 'save_sheet_as_csv')
+
+    reloaded = SkillRegistry(manifest, cache_dir=None)
+    assert reloaded.versions('save_sheet_as_csv') == ['2.0.0', '10.0.0']
+    assert reloaded.get('save_sheet_as_csv')() == 3
+    assert reloaded.get('save_sheet_as_csv', version='2.0.0')() == 'from the other manifest'
@@ -0,0 +1,98 @@
+"""Tests for workflow checkpoints"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from workflow import StepFailed, Workflow
+
+
+def _flow(checkpoint_dir, calls, fail_report=False):
+    """fetch(source) -> total(fetch) -> report(total); report can be made to fail."""
+    flow = Workflow('orders', checkpoint_dir=str(checkpoint_dir))
+
+    @flow.step(depends_on=['source'])
+    async def fetch(source):
+        calls.append('fetch')
+        return [source, source * 2]
+
+    @flow.step(depends_on=['fetch'])
+    async def total(fetch):
+        calls.append('total')
+        return sum(fetch)
+
+    @flow.step(depends_on=['total'])
+    async def report(total):
+        calls.append('report')
+        if fail_report:
+            raise RuntimeError('report server down')
+        return f'total={total}'
+
+    return flow
+
+
+def test_failed_run_resumes_from_checkpoints(tmp_path):
+    calls = []
+    with pytest.raises(StepFailed) as failure:
+        asyncio.run(_flow(tmp_path, calls, fail_report=True).run(source=1))
+    assert failure.value.step == 'report'
+
+    calls.clear()
+    flow = _flow(tmp_path, calls)
+    assert asyncio.run(flow.run(source=1)) == {'fetch': [1, 2], 'total': 3, 'report': 'total=3'}
+    assert sorted(flow.resumed) == ['fetch', 'total']
+    assert calls == ['report']
+    # A successful run removes its checkpoints
+    assert os.listdir(tmp_path / 'orders') == []
+
+
+def test_checkpoints_from_other_inputs_are_not_reused(tmp_path):
+    calls = []
+    with pytest.raises(StepFailed):
+        asyncio.run(_flow(tmp_path, calls, fail_report=True).run(source=1))
+
+    calls.clear()
+    flow = _flow(tmp_path, calls)
+    assert asyncio.run(flow.run(source=5))['report'] == 'total=15'
+    assert flow.resumed == []
+    assert calls == ['fetch', 'total', 'report']
+
+
+def test_resume_false_ignores_checkpoints(tmp_path):
+    calls = []
+    with pytest.raises(StepFailed):
+        asyncio.run(_flow(tmp_path, calls, fail_report=True).run(source=1))
+
+    calls.clear()
+    asyncio.run(_flow(tmp_path, calls).run(resume=False, source=1))
+    assert calls == ['fetch', 'total', 'report']
+
+
+def test_unserializable_result_fails_the_step_cleanly(tmp_path):
+    flow = Workflow('objects', checkpoint_dir=str(tmp_path))
+
+    @flow.step()
+    async def handle():
+        return object()
+
+    with pytest.raises(StepFailed) as failure:
+        asyncio.run(flow.run())
+    assert failure.value.step == 'handle'
+    assert isinstance(failure.value.error, TypeError)
+    directory = tmp_path / 'objects'
+    assert not directory.exists() or os.listdir(directory) == []
+
+
+def test_unserializable_result_without_checkpoint(tmp_path):
+    flow = Workflow('objects', checkpoint_dir=str(tmp_path))
+    marker = object()
+
+    @flow.step(checkpoint=False)
+    async def handle():
+        return marker
+
+    assert asyncio.run(flow.run()) == {'handle': marker}
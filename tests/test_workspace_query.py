@@ -0,0 +1,111 @@
+"""Tests for the local workspace query engine"""
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import workspace_query
+from workspace_query import Workspace
+
+ORDERS = [
+    {'Order ID': '1001', 'Status': 'pending', 'Amount': 150.0},
+    {'Order ID': '1002', 'Status': 'completed', 'Amount': 200.0},
+    {'Order ID': '1003', 'Status': 'pending', 'Amount': 175.5},
+    {'Order ID': '1004', 'Status': 'shipped', 'Amount': 300.0},
+]
+
+
+@pytest.fixture
+def ws():
+    with Workspace(':memory:', auto_index_after=2) as workspace:
+        workspace.ingest('orders', ORDERS)
+        yield workspace
+
+
+def _ids(rows):
+    return [row['Order ID'] for row in rows]
+
+
+def test_select_filters_and_orders(ws):
+    assert _ids(ws.select('orders', where={'Status': 'pending'})) == ['1001', '1003']
+    assert _ids(ws.select('orders', where={'Amount': ('>', 170)}, order_by='-Amount')) == [
+        '1004', '1002', '1003']
+    assert ws.select('orders', columns=['Status'], limit=1) == [{'Status': 'pending'}]
+
+
+def test_list_value_means_in(ws):
+    rows = ws.select('orders', where={'Status': ['shipped', 'completed']}, order_by='Order ID')
+    assert _ids(rows) == ['1002', '1004']
+    assert _ids(ws.select('orders', where={'Status': ('IN', ('shipped',))})) == ['1004']
+
+
+@pytest.mark.parametrize('call', [
+    lambda ws: ws.select('orders', where={'Stauts': 'pending'}),
+    lambda ws: ws.select('orders', columns=['Amnt']),
+    lambda ws: ws.select('orders', order_by='-Amnt'),
+    lambda ws: ws.create_index('orders', 'Typo'),
+    lambda ws: ws.select('missing'),
+])
+def test_unknown_columns_are_rejected(ws, call):
+    with pytest.raises(ValueError):
+        call(ws)
+
+
+def test_misspelt_filter_is_not_auto_indexed(ws):
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            ws.select('orders', where={'Stauts': 'pending'})
+    assert ws.query('SELECT name FROM _workspace_indexes') == []
+
+
+def test_repeated_filters_are_indexed(ws):
+    for _ in range(2):
+        ws.select('orders', where={'Status': 'pending'})
+    indexes = ws.query('SELECT table_name, columns FROM _workspace_indexes')
+    assert indexes == [{'table_name': 'orders', 'columns': '["Status"]'}]
+
+
+def test_index_names_do_not_collide():
+    with Workspace(':memory:') as ws:
+        ws.ingest('x_y', [{'z': 1}])
+        ws.ingest('x', [{'y_z': 1}])
+        assert ws.create_index('x_y', 'z') != ws.create_index('x', 'y_z')
+        assert ws.create_index('x_y', 'z') == ws.create_index('x_y', 'z')
+        assert len(ws.query('SELECT name FROM _workspace_indexes')) == 2
+
+
+def test_indexes_survive_reingest(ws):
+    name = ws.create_index('orders', 'Status')
+    ws.ingest('orders', ORDERS[:2])
+    sqlite_indexes = ws.query("SELECT name FROM sqlite_master WHERE type = 'index'")
+    assert {'name': name} in sqlite_indexes
+
+
+def test_ingest_sheet_runs_off_the_event_loop(monkeypatch):
+    threads = []
+    ingest = Workspace.ingest
+
+    def recording_ingest(self, *args, **kwargs):
+        threads.append(threading.get_ident())
+        return ingest(self, *args, **kwargs)
+
+    async def get_sheet(params):
+        return {'rows': ORDERS}
+
+    monkeypatch.setattr(Workspace, 'ingest', recording_ingest)
+    monkeypatch.setattr(workspace_query.google_drive, 'get_sheet', get_sheet)
+
+    async def main():
+        with Workspace(':memory:') as ws:
+            count = await ws.ingest_sheet('abc123', table='orders', index=['Status'])
+            return count, ws.select('orders', where={'Status': 'pending'})
+
+    count, rows = asyncio.run(main())
+    assert count == 4
+    assert _ids(rows) == ['1001', '1003']
+    assert threads and threads[0] != threading.get_ident()
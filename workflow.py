@@ -0,0 +1,262 @@
+"""
+Dependency-aware workflows of tool-call steps.
+
+Agent scripts often await tool calls one after another even when the calls
+do not depend on each other. A Workflow declares each step and the steps
+whose results it needs; the runner then:
+
+- starts every step as soon as its own dependencies have finished, so
+  independent steps run concurrently (tool calls stay bounded by
+  client.MAX_CONCURRENT_CALLS)
+- passes each step's result straight to the steps that depend on it, once
+  the step has finished (use pipeline.py to stream rows between tools)
+- checkpoints every completed step to disk from a worker thread, so a
+  failed run can be resumed without repeating expensive calls. A
+  checkpoint is keyed on the step's arguments, so it is only reused when
+  its inputs and dependency results are unchanged
+
+Example:
+    flow = Workflow('meeting-sync', checkpoint_dir='./workspace/checkpoints')
+
+    @flow.step()
+    async def transcript():
+        result = await google_drive.get_document({'document_id': 'abc123'})
+        return result['content']
+
+    @flow.step(depends_on=['transcript'])
+    async def notes(transcript):
+        return await salesforce.update_record({
+            'object_type': 'SalesMeeting',
+            'record_id': '00Q5f000001abcXYZ',
+            'data': {'Notes': transcript},
+        })
+
+    results = await flow.run()
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from offload import to_thread
+from workspace_io import _atomic_write
+
+StepFunction = Callable[..., Awaitable[Any]]
+
+
+class StepFailed(Exception):
+    """Raised by Workflow.run() when a step raises."""
+
+    def __init__(self, step: str, error: BaseException):
+        super().__init__(f"Step '{step}' failed: {error!r}")
+        self.step = step
+        self.error = error
+
+
+class Step:
+    """A named unit of work and the steps it depends on."""
+
+    def __init__(self, name: str, func: StepFunction,
+                 depends_on: Iterable[str] = (), checkpoint: bool = True):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.checkpoint = checkpoint
+
+
+class Workflow:
+    """
+    A DAG of async steps.
+
+    Each step function receives the results of its dependencies as keyword
+    arguments named after those steps, plus any keyword inputs given to
+    run() that it declares in depends_on.
+    """
+
+    def __init__(self, name: str, checkpoint_dir: Optional[str] = None,
+                 max_concurrency: Optional[int] = None):
+        """
+        Args:
+            name: Workflow name, used to keep its checkpoints apart
+            checkpoint_dir: Directory for step checkpoints (default: no checkpoints)
+            max_concurrency: Maximum number of steps running at once (default: no limit)
+        """
+        self.name = name
+        self.checkpoint_dir = checkpoint_dir
+        self.max_concurrency = max_concurrency
+        self.steps: Dict[str, Step] = {}
+        self.resumed: List[str] = []
+
+    def add_step(self, name: str, func: StepFunction,
+                 depends_on: Iterable[str] = (), checkpoint: bool = True) -> Step:
+        """
+        Add a step to the workflow.
+
+        Args:
+            name: Unique step name
+            func: Async function computing the step's result
+            depends_on: Names of steps (or run() inputs) whose results func needs
+            checkpoint: Persist the result so a resumed run can skip the step.
+                The result must then be JSON-serializable.
+
+        Returns:
+            The new step
+        """
+        if name in self.steps:
+            raise ValueError(f"Duplicate step: {name}")
+        step = Step(name, func, depends_on, checkpoint)
+        self.steps[name] = step
+        return step
+
+    def step(self, name: Optional[str] = None, *, depends_on: Iterable[str] = (),
+             checkpoint: bool = True) -> Callable[[StepFunction], StepFunction]:
+        """Decorator form of add_step(). The step name defaults to the function name."""
+        def decorator(func: StepFunction) -> StepFunction:
+            self.add_step(name or func.__name__, func, depends_on, checkpoint)
+            return func
+        return decorator
+
+    async def run(self, resume: bool = True, **inputs: Any) -> Dict[str, Any]:
+        """
+        Run the workflow.
+
+        Args:
+            resume: Reuse results checkpointed by a previous, failed run for
+                steps whose arguments are unchanged
+            **inputs: Extra values steps can depend on by name
+
+        Returns:
+            Dictionary mapping each step name to its result
+
+        Raises:
+            StepFailed: If a step raised, or returned a result that cannot be
+                checkpointed. Steps that do not depend on it still run to
+                completion and are checkpointed.
+        """
+        self._validate(inputs)
+        self.resumed = []
+        limit = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        tasks: Dict[str, 'asyncio.Task[Any]'] = {}
+
+        async def run_step(step: Step) -> Any:
+            kwargs = {}
+            for dependency in step.depends_on:
+                if dependency in inputs:
+                    kwargs[dependency] = inputs[dependency]
+                else:
+                    kwargs[dependency] = await tasks[dependency]
+
+            checkpoint = step.checkpoint and self.checkpoint_dir is not None
+            if checkpoint:
+                key = await to_thread(_arguments_key, kwargs)
+            if checkpoint and resume:
+                found, result = await to_thread(self._load_checkpoint, step.name, key)
+                if found:
+                    self.resumed.append(step.name)
+                    return result
+
+            try:
+                if limit is not None:
+                    async with limit:
+                        result = await step.func(**kwargs)
+                else:
+                    result = await step.func(**kwargs)
+            except Exception as error:
+                raise StepFailed(step.name, error) from error
+
+            if checkpoint:
+                try:
+                    # Serializing and fsyncing a large result would stall the loop
+                    await to_thread(self._save_checkpoint, step.name, key, result)
+                except (TypeError, ValueError) as error:
+                    raise StepFailed(step.name, error) from error
+            return result
+
+        for name in self._order():
+            tasks[name] = asyncio.ensure_future(run_step(self.steps[name]))
+
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        # Dependents of a failed step re-raise its StepFailed, and tasks are in
+        # dependency order, so the first failure is always the root cause
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+
+        self.reset()
+        return dict(zip(tasks, outcomes))
+
+    def reset(self) -> None:
+        """Delete all checkpoints of this workflow."""
+        directory = self._checkpoint_path()
+        if directory is None or not os.path.isdir(directory):
+            return
+        for name in self.steps:
+            path = os.path.join(directory, f'{name}.json')
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _validate(self, inputs: Dict[str, Any]) -> None:
+        for step in self.steps.values():
+            for dependency in step.depends_on:
+                if dependency not in self.steps and dependency not in inputs:
+                    raise ValueError(f"Step '{step.name}' depends on unknown step '{dependency}'")
+
+    def _order(self) -> List[str]:
+        """Steps in dependency order. Raises ValueError on cycles."""
+        order: List[str] = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str) -> None:
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Dependency cycle through step '{name}'")
+            state[name] = 'visiting'
+            for dependency in self.steps[name].depends_on:
+                if dependency in self.steps:
+                    visit(dependency)
+            state[name] = 'done'
+            order.append(name)
+
+        for name in self.steps:
+            visit(name)
+        return order
+
+    def _checkpoint_path(self) -> Optional[str]:
+        if self.checkpoint_dir is None:
+            return None
+        return os.path.join(self.checkpoint_dir, self.name)
+
+    def _load_checkpoint(self, step: str, key: str) -> Tuple[bool, Any]:
+        directory = self._checkpoint_path()
+        if directory is None:
+            return False, None
+        path = os.path.join(directory, f'{step}.json')
+        if not os.path.exists(path):
+            return False, None
+        with open(path, 'r') as f:
+            checkpoint = json.load(f)
+        # A checkpoint made from other arguments is stale; the step runs again
+        if checkpoint.get('key') != key:
+            os.remove(path)
+            return False, None
+        return True, checkpoint['result']
+
+    def _save_checkpoint(self, step: str, key: str, result: Any) -> None:
+        directory = self._checkpoint_path()
+        if directory is None:
+            return
+        # Serialize first, so a result that is not JSON-serializable leaves no file behind
+        data = json.dumps({'step': step, 'key': key, 'result': result})
+        os.makedirs(directory, exist_ok=True)
+        # Replaced atomically, so a crash never leaves a torn checkpoint
+        _atomic_write(os.path.join(directory, f'{step}.json'), data)
+
+
+def _arguments_key(kwargs: Dict[str, Any]) -> str:
+    """Hash of a step's arguments: its run() inputs and dependency results."""
+    data = json.dumps(kwargs, sort_keys=True, default=repr)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
@@ -0,0 +1,301 @@
+"""
+Async file I/O for the workspace.
+
+Plain open()/write()/fsync() calls block the event loop, and with it every
+in-flight tool call, for as long as the disk takes. The functions here
+do their disk work in the offload thread pool instead:
+
+- AsyncFile buffers writes in memory and hands full buffers to a worker
+  thread, so the loop never waits for a write() to reach the disk
+- AsyncFile.sync() and the fsync options run fsync in a worker thread
+- iter_chunks() and read_csv() read files sequentially through mmap in a
+  worker thread, and map_file() exposes a mapping without copying it
+
+Only the standard library is used, so aiofiles is not needed.
+
+Example:
+    await write_csv('./workspace/orders.csv', rows)
+    sample = await read_csv('./workspace/orders.csv', limit=3)
+"""
+
+import asyncio
+import contextlib
+import csv
+import io
+import itertools
+import mmap
+import os
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Sequence, Union
+
+from offload import offload, to_thread
+
+# Writes are buffered until this many bytes are pending
+BUFFER_SIZE = 1024 * 1024
+
+# Rows formatted per chunk by write_csv
+CSV_CHUNK_ROWS = 10_000
+
+
+class AsyncFile:
+    """A binary file whose writes, flushes and fsyncs run off the event loop."""
+
+    def __init__(self, file: BinaryIO, buffer_size: int = BUFFER_SIZE):
+        self._file = file
+        self.buffer_size = buffer_size
+        self._buffer = bytearray()
+        self._position = file.tell()
+        # Disk operations run one at a time, in the order they were requested
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def open(cls, path: str, mode: str = 'wb', buffer_size: int = BUFFER_SIZE) -> 'AsyncFile':
+        """Open path in a binary mode ('wb', 'ab', 'r+b', ...)."""
+        if 'b' not in mode:
+            raise ValueError("AsyncFile only supports binary modes")
+        file = await to_thread(open, path, mode)
+        return cls(file, buffer_size)
+
+    @property
+    def name(self) -> str:
+        return self._file.name  # type: ignore[return-value]
+
+    def tell(self) -> int:
+        """Position after the last write, including buffered data."""
+        return self._position
+
+    async def write(self, data: Union[bytes, str]) -> None:
+        """Buffer data (str is encoded as UTF-8), writing it out once the buffer is full."""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._buffer += data
+        self._position += len(data)
+        if len(self._buffer) >= self.buffer_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write out everything buffered so far."""
+        async with self._lock:
+            if not self._buffer:
+                return
+            data, self._buffer = self._buffer, bytearray()
+            await to_thread(self._write, data)
+
+    async def sync(self) -> None:
+        """Flush and fsync, so everything written so far is durable."""
+        await self.flush()
+        async with self._lock:
+            await to_thread(os.fsync, self._file.fileno())
+
+    async def seek(self, offset: int) -> None:
+        """Flush, then move to an absolute offset."""
+        await self.flush()
+        async with self._lock:
+            self._position = await to_thread(self._file.seek, offset)
+
+    async def truncate(self, size: int) -> None:
+        """Flush, then cut the file to size bytes. The position is unchanged."""
+        await self.flush()
+        async with self._lock:
+            await to_thread(self._file.truncate, size)
+
+    async def close(self) -> None:
+        """Flush and close the file."""
+        try:
+            await self.flush()
+        finally:
+            await to_thread(self._file.close)
+
+    async def __aenter__(self) -> 'AsyncFile':
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._file.flush()
+
+
+def format_csv(rows: Sequence[Dict[str, Any]], fieldnames: Sequence[str],
+               header: bool = False, extrasaction: str = 'raise') -> bytes:
+    """Format rows (and optionally the header) as UTF-8 CSV."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction=extrasaction)
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+async def write_csv(path: str, rows: Sequence[Dict[str, Any]],
+                    fieldnames: Optional[Sequence[str]] = None, fsync: bool = False) -> int:
+    """
+    Write rows to a CSV file without blocking the event loop.
+
+    Rows are formatted in chunks of CSV_CHUNK_ROWS, in the thread pool for
+    full chunks, and written through an AsyncFile.
+
+    Args:
+        path: CSV file to create or overwrite
+        rows: Rows to write
+        fieldnames: Columns (default: the keys of the first row)
+        fsync: Make the file durable before returning
+
+    Returns:
+        Number of bytes written
+    """
+    if fieldnames is None:
+        fieldnames = list(rows[0].keys()) if rows else []
+
+    async with await AsyncFile.open(path, 'wb') as f:
+        await f.write(format_csv([], fieldnames, header=True))
+        for start in range(0, len(rows), CSV_CHUNK_ROWS):
+            chunk = rows[start:start + CSV_CHUNK_ROWS]
+            await f.write(await offload(format_csv, chunk, fieldnames, size=len(chunk)))
+        if fsync:
+            await f.sync()
+        return f.tell()
+
+
+async def write_bytes(path: str, data: Union[bytes, str], fsync: bool = False) -> None:
+    """Write data to path in a worker thread, optionally fsyncing it."""
+    await to_thread(_write_file, path, data, fsync)
+
+
+async def atomic_write(path: str, data: Union[bytes, str]) -> None:
+    """
+    Replace path with data in one step.
+
+    data is written and fsynced to a temporary file that then replaces
+    path, so readers see either the old or the new contents. The directory
+    is fsynced after the rename, so the new contents survive a crash.
+    """
+    await to_thread(_atomic_write, path, data)
+
+
+def _atomic_write(path: str, data: Union[bytes, str]) -> None:
+    """Blocking atomic_write(), for code that already runs in a worker thread."""
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        _write_file(temp_path, data, True)
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+    _fsync_dir(os.path.dirname(path) or '.')
+
+
+def _fsync_dir(directory: str) -> None:
+    """Make renames and new files in directory durable."""
+    if os.name == 'nt':
+        # Windows cannot open a directory for fsync
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_file(path: str, data: Union[bytes, str], fsync: bool) -> None:
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+@contextlib.contextmanager
+def _mapped(f: BinaryIO) -> Iterator[mmap.mmap]:
+    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if hasattr(mapped, 'madvise'):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        yield mapped
+    finally:
+        mapped.close()
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+async def read_bytes(path: str) -> bytes:
+    """Read a whole file into memory in a worker thread."""
+    return await to_thread(_read_bytes, path)
+
+
+def _read_chunk(mapped: mmap.mmap, start: int, size: int) -> bytes:
+    return mapped[start:start + size]
+
+
+async def iter_chunks(path: str, chunk_size: int = BUFFER_SIZE) -> AsyncIterator[bytes]:
+    """
+    Read a file sequentially through mmap, one chunk at a time.
+
+    Each chunk is copied out of the mapping in a worker thread, so page
+    faults never block the event loop, and only one chunk is held in
+    memory at a time.
+    """
+    f = await to_thread(open, path, 'rb')
+    try:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with _mapped(f) as mapped:
+            for start in range(0, size, chunk_size):
+                yield await to_thread(_read_chunk, mapped, start, chunk_size)
+    finally:
+        await to_thread(f.close)
+
+
+@contextlib.asynccontextmanager
+async def map_file(path: str) -> AsyncIterator[memoryview]:
+    """
+    Map a file read-only and yield it as a memoryview, without copying it.
+
+    Touching a page that is not in memory yet reads it from disk on the
+    calling thread, so use iter_chunks() to scan large files from the
+    event loop. Slices of the view must not be kept after the block.
+    """
+    f = await to_thread(open, path, 'rb')
+    try:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield memoryview(b'')
+            return
+        with _mapped(f) as mapped:
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+    finally:
+        await to_thread(f.close)
+
+
+def _read_csv(path: str, limit: Optional[int]) -> List[Dict[str, str]]:
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with _mapped(f) as mapped:
+            # Only the pages holding the rows that are read get loaded
+            lines = (line.decode('utf-8') for line in iter(mapped.readline, b''))
+            return list(itertools.islice(csv.DictReader(lines), limit))
+
+
+async def read_csv(path: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+    """
+    Read rows from a CSV file in a worker thread.
+
+    Args:
+        path: CSV file with a header row
+        limit: Read at most this many rows (default: all)
+
+    Returns:
+        The rows as dicts keyed by column
+    """
+    return await to_thread(_read_csv, path, limit)
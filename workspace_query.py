@@ -0,0 +1,335 @@
+"""
+Local query engine over cached tool results.
+
+Instead of re-fetching a sheet or a Salesforce query and filtering it in a
+Python loop every time, an agent can load the result once into a SQLite
+database in the workspace and answer filters, aggregates and cross-tool
+joins locally:
+
+    ws = Workspace()
+    await ws.ingest_sheet('abc123', table='orders', index=['Status'])
+    await ws.ingest_query('SELECT Id, Email, Name FROM Lead', table='leads')
+
+    ws.select('orders', where={'Status': 'pending'})
+    ws.query('SELECT Status, COUNT(*) AS n, SUM(Amount) AS total '
+             'FROM orders GROUP BY Status')
+
+Columns that select() filters on repeatedly are indexed automatically.
+Ingestion runs in the offload thread pool, so loading a large result does
+not block the event loop.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from offload import to_thread
+from servers import google_drive, salesforce
+
+# Comparison operators accepted in select() filters
+OPERATORS = ('=', '!=', '<', '<=', '>', '>=', 'LIKE', 'IN')
+
+# Rows are inserted in batches of this size
+INSERT_BATCH_SIZE = 10_000
+
+
+def _quote(name: str) -> str:
+    """Quote an SQL identifier such as 'Order ID'."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _column_type(value: Any) -> str:
+    if isinstance(value, bool) or isinstance(value, int):
+        return 'INTEGER'
+    if isinstance(value, float):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _sql_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+class Workspace:
+    """A SQLite database of cached tool results."""
+
+    def __init__(self, path: str = './workspace/workspace.db', auto_index_after: int = 3):
+        """
+        Args:
+            path: Database file (':memory:' for a throwaway workspace)
+            auto_index_after: Index a column once select() has filtered on it
+                this many times. 0 disables automatic indexing.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.auto_index_after = auto_index_after
+        self._filter_counts: Dict[Tuple[str, str], int] = {}
+
+        # ingest_sheet() and ingest_query() load rows from a worker thread;
+        # the lock keeps their transactions apart from other calls
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        with self.db:
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS _workspace_tables ('
+                ' name TEXT PRIMARY KEY, source TEXT, row_count INTEGER, ingested_at REAL)'
+            )
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS _workspace_indexes ('
+                ' name TEXT PRIMARY KEY, table_name TEXT NOT NULL, columns TEXT NOT NULL)'
+            )
+
+    def __enter__(self) -> 'Workspace':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database."""
+        self.db.close()
+
+    def ingest(self, table: str, rows: Iterable[Dict[str, Any]], replace: bool = True,
+               index: Sequence[str] = (), source: Optional[str] = None) -> int:
+        """
+        Load rows into a table.
+
+        Columns are taken from the rows' keys; nested values are stored as
+        JSON text. Rows are inserted with executemany() in batches, in a
+        single transaction.
+
+        Args:
+            table: Table name
+            rows: Rows to load
+            replace: Replace the table's contents (default) or append to it
+            index: Columns to index after loading
+            source: Description of where the rows came from, kept as metadata
+
+        Returns:
+            Number of rows loaded
+        """
+        with self._lock:
+            return self._ingest(table, list(rows), replace, index, source)
+
+    def _ingest(self, table: str, rows: List[Dict[str, Any]], replace: bool,
+                index: Sequence[str], source: Optional[str]) -> int:
+        # The first non-null value of each column decides its type
+        seen: Dict[str, Optional[str]] = {}
+        for row in rows:
+            for key, value in row.items():
+                if seen.get(key) is None:
+                    seen[key] = _column_type(value) if value is not None else None
+        columns = {key: column_type or 'TEXT' for key, column_type in seen.items()}
+
+        with self.db:
+            if replace:
+                self.db.execute(f'DROP TABLE IF EXISTS {_quote(table)}')
+            existing = self._columns(table)
+            if not existing:
+                definition = ', '.join(f'{_quote(c)} {t}' for c, t in columns.items())
+                self.db.execute(f'CREATE TABLE {_quote(table)} ({definition or "_empty TEXT"})')
+            else:
+                for column, column_type in columns.items():
+                    if column not in existing:
+                        self.db.execute(
+                            f'ALTER TABLE {_quote(table)} ADD COLUMN {_quote(column)} {column_type}'
+                        )
+
+            if columns:
+                names = list(columns)
+                statement = (
+                    f'INSERT INTO {_quote(table)} ({", ".join(map(_quote, names))}) '
+                    f'VALUES ({", ".join("?" * len(names))})'
+                )
+                for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                    self.db.executemany(statement, (
+                        tuple(_sql_value(row.get(name)) for name in names)
+                        for row in rows[start:start + INSERT_BATCH_SIZE]
+                    ))
+
+            row_count = self.db.execute(f'SELECT COUNT(*) FROM {_quote(table)}').fetchone()[0]
+            self.db.execute(
+                'INSERT OR REPLACE INTO _workspace_tables (name, source, row_count, ingested_at) '
+                'VALUES (?, COALESCE(?, (SELECT source FROM _workspace_tables WHERE name = ?)), ?, ?)',
+                (table, source, table, row_count, time.time()),
+            )
+
+        # Dropping the table dropped its indexes; recreate the ones asked for before
+        for name, columns_json in self.db.execute(
+            'SELECT name, columns FROM _workspace_indexes WHERE table_name = ?', (table,)
+        ).fetchall():
+            self.create_index(table, *json.loads(columns_json))
+        if index:
+            self.create_index(table, *index)
+        return len(rows)
+
+    async def ingest_sheet(self, sheet_id: str, table: Optional[str] = None,
+                           index: Sequence[str] = ()) -> int:
+        """
+        Fetch a Google Sheet and load its rows.
+
+        Args:
+            sheet_id: The ID of the sheet
+            table: Table name (default: sheet_<sheet_id>)
+            index: Columns to index
+
+        Returns:
+            Number of rows loaded
+        """
+        result = await google_drive.get_sheet({'sheet_id': sheet_id})
+        return await to_thread(self.ingest, table or f'sheet_{sheet_id}', result['rows'],
+                               index=index, source=f'google_drive.get_sheet:{sheet_id}')
+
+    async def ingest_query(self, soql: str, table: str, index: Sequence[str] = ()) -> int:
+        """
+        Run a Salesforce query and load its records.
+
+        Args:
+            soql: The SOQL query
+            table: Table name
+            index: Columns to index
+
+        Returns:
+            Number of records loaded
+        """
+        result = await salesforce.query({'query': soql})
+        return await to_thread(self.ingest, table, result['records'], index=index,
+                               source=f'salesforce.query:{soql}')
+
+    def create_index(self, table: str, *columns: str) -> str:
+        """
+        Index one or more columns of a table. Existing indexes are kept.
+
+        Returns:
+            The index name
+
+        Raises:
+            ValueError: If the table has no such column
+        """
+        self._check_columns(table, columns)
+        # Hash the exact (table, columns) so names cannot collide, e.g. table
+        # 'x_y' column 'z' and table 'x' column 'y_z'
+        key = json.dumps([table, *columns]).encode('utf-8')
+        name = f'idx_{table}_{hashlib.blake2b(key, digest_size=8).hexdigest()}'
+        with self._lock, self.db:
+            self.db.execute(
+                f'CREATE INDEX IF NOT EXISTS {_quote(name)} ON {_quote(table)} '
+                f'({", ".join(map(_quote, columns))})'
+            )
+            self.db.execute(
+                'INSERT OR REPLACE INTO _workspace_indexes (name, table_name, columns) VALUES (?, ?, ?)',
+                (name, table, json.dumps(list(columns))),
+            )
+        return name
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        """
+        Run an SQL statement and return the result rows as dictionaries.
+
+        Tables from different tools can be joined, e.g.
+        ``SELECT o.*, l.Email FROM orders o JOIN leads l ON l.Name = o.Customer``.
+        """
+        with self._lock:
+            cursor = self.db.execute(sql, params)
+            if cursor.description is None:
+                return []
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def select(self, table: str, where: Optional[Dict[str, Any]] = None,
+               columns: Optional[Sequence[str]] = None, order_by: Optional[str] = None,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Filter a table without writing SQL.
+
+        Args:
+            table: Table name
+            where: Column -> value for equality, column -> list of values
+                (IN), or column -> (operator, value) with an operator from
+                OPERATORS. IN takes a sequence.
+            columns: Columns to return (default: all)
+            order_by: Column to sort by; prefix with '-' for descending
+            limit: Maximum number of rows
+
+        Returns:
+            Matching rows as dictionaries
+
+        Raises:
+            ValueError: If a column does not exist or an operator is unsupported
+        """
+        where = where or {}
+        order_column = order_by.lstrip('-') if order_by else None
+        # A double-quoted name that is not a column is an SQL string literal,
+        # so a misspelt column would silently match nothing
+        self._check_columns(table, [*where, *(columns or ()),
+                                    *([order_column] if order_column else [])])
+
+        clauses = []
+        params: List[Any] = []
+        for column, condition in where.items():
+            if isinstance(condition, tuple):
+                operator, value = condition
+            elif isinstance(condition, (list, set, frozenset)):
+                operator, value = 'IN', condition
+            else:
+                operator, value = '=', condition
+            operator = operator.upper()
+            if operator not in OPERATORS:
+                raise ValueError(f"Unsupported operator: {operator}")
+            if operator == 'IN':
+                values = list(value)
+                clauses.append(f'{_quote(column)} IN ({", ".join("?" * len(values))})')
+                params.extend(values)
+            else:
+                clauses.append(f'{_quote(column)} {operator} ?')
+                params.append(value)
+            self._note_filter(table, column)
+
+        selected = ', '.join(map(_quote, columns)) if columns else '*'
+        sql = f'SELECT {selected} FROM {_quote(table)}'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        if order_by:
+            descending = order_by.startswith('-')
+            sql += f' ORDER BY {_quote(order_column)}' + (' DESC' if descending else '')
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return self.query(sql, params)
+
+    def tables(self) -> List[Dict[str, Any]]:
+        """List ingested tables with their source, row count and ingestion time."""
+        return self.query(
+            'SELECT name, source, row_count, ingested_at FROM _workspace_tables ORDER BY name'
+        )
+
+    def _columns(self, table: str) -> List[str]:
+        with self._lock:
+            return [row[1] for row in self.db.execute(f'PRAGMA table_info({_quote(table)})')]
+
+    def _check_columns(self, table: str, names: Iterable[str]) -> None:
+        existing = self._columns(table)
+        if not existing:
+            raise ValueError(f"No such table: {table}")
+        unknown = [name for name in names if name not in existing]
+        if unknown:
+            raise ValueError(f"Unknown column(s) in {table}: {', '.join(unknown)}; "
+                             f"columns are {', '.join(existing)}")
+
+    def _note_filter(self, table: str, column: str) -> None:
+        if not self.auto_index_after:
+            return
+        key = (table, column)
+        self._filter_counts[key] = self._filter_counts.get(key, 0) + 1
+        if self._filter_counts[key] == self.auto_index_after:
+            self.create_index(table, column)